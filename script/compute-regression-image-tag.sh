@@ -51,19 +51,21 @@ prefetch_service_image_tags() {
   export SERVICE_IMAGE_TAG_JSON
 }
 
-compute_regression_image_tag() {
-  local suite_name="$1"
-  local harmony_host_url="$2"
-  local services_file="$SCRIPT_DIR/../test/$suite_name/services_tested.txt"
+## Compute the regression image tags for many suites in a single pass over the
+## /service-image-tag response. Prints a tab-separated suite name and tag on
+## each line, in the order the suites were given. Returns 1 if the tag for any
+## suite cannot be computed.
+compute_regression_image_tags() {
+  local harmony_host_url="$1"
+  shift
   local service_tag_url
   local service_tags_json
+  local services_file
   local services_csv
+  local suite_services=""
+  local suite
   local computed_tag
-
-  if [[ ! -f "$services_file" ]]; then
-    echo "services_tested file not found: $services_file" >&2
-    return 1
-  fi
+  local status=0
 
   service_tag_url=$(service_image_tag_url_for_host "$harmony_host_url") || return 1
 
@@ -90,32 +92,188 @@ compute_regression_image_tag() {
     return 1
   fi
 
-  services_csv=$(tr -d '\n\r' < "$services_file")
-  IFS=',' read -r -a raw_services <<< "$services_csv"
+  # One "<suite><tab><services>" line per suite, read without subprocesses.
+  for suite in "$@"; do
+    services_file="$SCRIPT_DIR/../test/$suite/services_tested.txt"
+    if [[ ! -f "$services_file" ]]; then
+      echo "services_tested file not found: $services_file" >&2
+      return 1
+    fi
+
+    services_csv=$(<"$services_file")
+    suite_services+="${suite}"$'\t'"${services_csv//[$'\n\r']/}"$'\n'
+  done
 
-  parts=()
-  for service in "${raw_services[@]}"; do
-    service=$(echo "$service" | xargs)
-    if [[ -z "$service" ]]; then
+  # Join "<service><version>" for each trimmed service name with "_". Suites
+  # whose tag cannot be computed are returned with "!no-services", or with
+  # "!missing:" and the first service without a deployed version.
+  while IFS=$'\t' read -r suite computed_tag; do
+    if [[ -z "$suite" ]]; then
       continue
+    elif [[ "$computed_tag" == '!no-services' ]]; then
+      echo "No services found in $SCRIPT_DIR/../test/$suite/services_tested.txt" >&2
+      status=1
+    elif [[ "$computed_tag" == '!missing:'* ]]; then
+      echo "No deployed version found for service '${computed_tag#!missing:}' at $service_tag_url" >&2
+      status=1
+    else
+      printf '%s\t%s\n' "$suite" "$computed_tag"
     fi
+  done < <(jq -r --arg suites "$suite_services" '
+    . as $tags
+    | $suites | split("\n")[] | select(length > 0) | split("\t")
+    | .[0] as $suite
+    | [(.[1] // "") | split(",")[] | gsub("^\\s+|\\s+$"; "") | select(length > 0)]
+    | if length == 0 then
+        "\($suite)\t!no-services"
+      elif any(.[]; ($tags[.] // null) == null) then
+        "\($suite)\t!missing:\(map(select(($tags[.] // null) == null))[0])"
+      else
+        "\($suite)\t\(map("\(.)\($tags[.])") | join("_"))"
+      end
+  ' <<< "$service_tags_json")
+
+  return "$status"
+}
 
-    version=$(echo "$service_tags_json" | jq -r --arg service "$service" '.[$service] // empty')
-    if [[ -z "$version" ]]; then
-      echo "No deployed version found for service '$service' at $service_tag_url" >&2
-      return 1
+## Compute the regression image tag for a single suite.
+compute_regression_image_tag() {
+  local suite_name="$1"
+  local harmony_host_url="$2"
+  local tag_line
+
+  tag_line=$(compute_regression_image_tags "$harmony_host_url" "$suite_name") || return 1
+  echo "${tag_line#*$'\t'}"
+}
+
+## Returns 0 if an image exists in the registry. Results are cached in
+## REGRESSION_MANIFEST_CACHE, so each image is only checked once per run.
+function manifest_exists () {
+    local image="$1"
+    local cached_image
+    local exists
+
+    while IFS=$'\t' read -r cached_image exists; do
+      if [[ "$cached_image" == "$image" ]]; then
+        [[ "$exists" == true ]]
+        return
+      fi
+    done <<< "${REGRESSION_MANIFEST_CACHE:-}"
+
+    if docker manifest inspect "$image" >/dev/null 2>&1; then
+      exists=true
+    else
+      exists=false
     fi
+    REGRESSION_MANIFEST_CACHE+="${image}"$'\t'"${exists}"$'\n'
+    [[ "$exists" == true ]]
+}
 
-    parts+=("${service}${version}")
-  done
+## Resolve the image to use for each suite when dynamic mode is used, setting
+## SUITE_IMAGE_MAP to a tab-separated suite name, image and computed tag on
+## each line. Tags for all suites are computed in one pass, and registry
+## manifests are checked MANIFEST_PARALLELISM (default 8) at a time. Suites
+## without an image for their computed tag fall back to the version in
+## test/<suite>/version.txt. Use suite_image and suite_service_tag to read
+## the map.
+function resolve_suite_images () {
+    local harmony_host_url="$1"
+    shift
+    local parallelism="${MANIFEST_PARALLELISM:-8}"
+    local tag_lines
+    local suite
+    local computed_tag
+    local image
+    local index
+    local results_dir
+    local suites=()
+    local tags=()
+    local images=()
+    local unchecked=()
+
+    tag_lines=$(compute_regression_image_tags "$harmony_host_url" "$@") || return 1
+
+    while IFS=$'\t' read -r suite computed_tag; do
+      if [[ -z "$suite" ]]; then
+        continue
+      fi
+      suites+=("$suite")
+      tags+=("$computed_tag")
+      images+=("ghcr.io/nasa/regression-tests-${suite}:${computed_tag}")
+    done <<< "$tag_lines"
+
+    # Check uncached manifests concurrently, then add them to the cache.
+    for image in "${images[@]}"; do
+      if [[ $'\n'"${REGRESSION_MANIFEST_CACHE:-}" != *$'\n'"${image}"$'\t'* ]]; then
+        unchecked+=("$image")
+      fi
+    done
+
+    results_dir=$(mktemp -d)
+    for index in "${!unchecked[@]}"; do
+      if (( index > 0 && index % parallelism == 0 )); then
+        wait
+      fi
+      (
+        if docker manifest inspect "${unchecked[index]}" >/dev/null 2>&1; then
+          echo true > "${results_dir}/${index}"
+        else
+          echo false > "${results_dir}/${index}"
+        fi
+      ) &
+    done
+    wait
+
+    for index in "${!unchecked[@]}"; do
+      REGRESSION_MANIFEST_CACHE+="${unchecked[index]}"$'\t'"$(<"${results_dir}/${index}")"$'\n'
+    done
+    /bin/rm -rf "$results_dir"
+
+    SUITE_IMAGE_MAP=""
+    for index in "${!suites[@]}"; do
+      suite="${suites[index]}"
+      image="${images[index]}"
+
+      if ! manifest_exists "$image"; then
+        echo "No image found for tag '${tags[index]}', falling back to version in ${SCRIPT_DIR}/../test/${suite}/version.txt" >&2
+        echo "You can add the tag to the desired image version by running './script/add-ghcr-tag.sh ghcr.io/nasa/regression-tests-${suite}:<version> ${tags[index]}'" >&2
+        image="ghcr.io/nasa/regression-tests-${suite}:$(<"${SCRIPT_DIR}/../test/${suite}/version.txt")"
+      fi
+
+      SUITE_IMAGE_MAP+="${suite}"$'\t'"${image}"$'\t'"${tags[index]}"$'\n'
+    done
+}
+
+## Print the image for a suite from SUITE_IMAGE_MAP.
+function suite_image () {
+    local suite
+    local image
+    local computed_tag
+
+    while IFS=$'\t' read -r suite image computed_tag; do
+      if [[ "$suite" == "$1" ]]; then
+        echo "$image"
+        return 0
+      fi
+    done <<< "${SUITE_IMAGE_MAP:-}"
 
-  if [[ ${#parts[@]} -eq 0 ]]; then
-    echo "No services found in $services_file" >&2
     return 1
-  fi
+}
+
+## Print the computed regression image tag for a suite from SUITE_IMAGE_MAP.
+function suite_service_tag () {
+    local suite
+    local image
+    local computed_tag
+
+    while IFS=$'\t' read -r suite image computed_tag; do
+      if [[ "$suite" == "$1" ]]; then
+        echo "$computed_tag"
+        return 0
+      fi
+    done <<< "${SUITE_IMAGE_MAP:-}"
 
-  computed_tag=$(IFS=_; echo "${parts[*]}")
-  echo "$computed_tag"
+    return 1
 }
 
 ## Returns the image name to use for a suite when dynamic mode is used.
@@ -126,25 +284,9 @@ compute_regression_image_tag() {
 function dynamic_image_name () {
     local suite="$1"
     local harmony_host_url="$2"
-    local base="ghcr.io/nasa/regression-tests-${suite}"
 
-    local computed_tag
-    if ! computed_tag=$(compute_regression_image_tag "$suite" "$harmony_host_url"); then
-      return 1
-    fi
-
-    if [[ -n "$computed_tag" ]] && \
-       docker manifest inspect "${base}:${computed_tag}" >/dev/null 2>&1; then
-        echo "${base}:${computed_tag}"
-    else
-        if [[ -n "$computed_tag" ]]; then
-          echo "No image found for tag '${computed_tag}', falling back to version in ${SCRIPT_DIR}/../test/${suite}/version.txt" >&2
-          echo "You can add the tag to the desired image version by running './script/add-ghcr-tag.sh ${base}:<version> ${computed_tag}'" >&2
-        else
-          echo "Could not compute image tag for '${suite}', falling back to version in ${SCRIPT_DIR}/../test/${suite}/version.txt" >&2
-        fi
-        echo "${base}:$(<"${SCRIPT_DIR}/../test/${suite}/version.txt")"
-    fi
+    resolve_suite_images "$harmony_host_url" "$suite" || return 1
+    suite_image "$suite"
 }
 
 usage() {
@@ -0,0 +1,95 @@
+#!/bin/bash
+
+## Pull regression test images from the container registry in parallel.
+##
+## Duplicate image names are pulled once, and images that are already present
+## locally with the same digest as the registry are not pulled again. The pull
+## time and size of each image are reported once all pulls have completed.
+##
+## The number of simultaneous pulls defaults to 4, and can be set with the
+## PULL_PARALLELISM environment variable.
+
+# Print the digest of an image in the registry, if it can be determined.
+remote_image_digest() {
+  local image="$1"
+
+  docker buildx imagetools inspect "$image" --format '{{.Manifest.Digest}}' 2>/dev/null
+}
+
+# Succeeds if the image is present locally with the given registry digest.
+local_image_has_digest() {
+  local image="$1"
+  local digest="$2"
+  local repository="${image%:*}"
+
+  docker image inspect --format '{{join .RepoDigests "\n"}}' "$image" 2>/dev/null \
+    | grep -qxF "${repository}@${digest}"
+}
+
+# Pull a single image, writing a tab-separated line with the image name,
+# status, pull duration in seconds and image size in bytes to a report file.
+pull_image() {
+  local image="$1"
+  local report_file="$2"
+  local status="pulled"
+  local digest
+  local start_time
+  local size
+
+  start_time=$(date +%s)
+  digest=$(remote_image_digest "$image" || true)
+
+  if [[ -n "$digest" ]] && local_image_has_digest "$image" "$digest"; then
+    status="up to date"
+  elif ! docker pull --quiet "$image" >/dev/null; then
+    echo "ERROR: Failed to pull image: ${image}" >&2
+    status="failed"
+  fi
+
+  size=$(docker image inspect --format '{{.Size}}' "$image" 2>/dev/null || echo 0)
+  printf '%s\t%s\t%s\t%s\n' "$image" "$status" "$(( $(date +%s) - start_time ))" \
+    "$size" > "$report_file"
+}
+
+# Pull all of the images passed as arguments, at most PULL_PARALLELISM at a
+# time, then print a summary table. The unique image names are written, in
+# order, to pulled-images.txt for clean-up-docker-images.sh.
+pull_images() {
+  local parallelism="${PULL_PARALLELISM:-4}"
+  local report_dir
+  local image
+  local index=0
+  local -A seen_images=()
+  local unique_images=()
+
+  for image in "$@"; do
+    if [[ -z "${seen_images[$image]:-}" ]]; then
+      seen_images[$image]=1
+      unique_images+=("$image")
+    fi
+  done
+
+  report_dir=$(mktemp -d)
+  /bin/rm -f pulled-images.txt
+
+  for image in "${unique_images[@]}"; do
+    echo "Pulling image: ${image}"
+    echo "${image}" >> pulled-images.txt
+
+    while (( $(jobs -rp | wc -l) >= parallelism )); do
+      wait -n || true
+    done
+
+    pull_image "$image" "${report_dir}/$(printf '%04d' "$index").tsv" &
+    index=$(( index + 1 ))
+  done
+
+  wait || true
+
+  echo "Pulled ${#unique_images[@]} unique images (${#} requested), ${parallelism} at a time:"
+  printf '%-80s %-11s %8s %10s\n' "IMAGE" "STATUS" "SECONDS" "SIZE (MB)"
+  cat "${report_dir}"/*.tsv 2>/dev/null \
+    | awk -F '\t' '{ printf "%-80s %-11s %8d %10.1f\n", $1, $2, $3, $4 / 1000000 }'
+
+  /bin/rm -rf "$report_dir"
+}
@@ -9,6 +9,7 @@ set -ex
 SCRIPT_DIR=$( cd -- "$( dirname -- "${BASH_SOURCE[0]}" )" &> /dev/null && pwd )
 source "${SCRIPT_DIR}/compute-regression-image-tag.sh"
 source "${SCRIPT_DIR}/image_name.sh"
+source "${SCRIPT_DIR}/pull-images.sh"
 
 if [[ -z "${HARMONY_ENVIRONMENT}" ]]; then
   echo "HARMONY_ENVIRONMENT must be set to run this script"
@@ -62,22 +63,29 @@ if [ "${HARMONY_ENVIRONMENT}" = "sit" ]; then
 else
   echo "Fetching /service-image-tag once and reusing it for all suites"
   prefetch_service_image_tags "$harmony_host_url"
+  resolve_suite_images "$harmony_host_url" "${all_tests[@]}"
+  # Reuse the registry manifest checks when run_notebooks.sh resolves images.
+  export REGRESSION_MANIFEST_CACHE
   for image in "${all_tests[@]}"; do
-      full_image=$(dynamic_image_name "$image" "$harmony_host_url")
-      image_names+=("${full_image}")
+      image_names+=("$(suite_image "$image")")
   done
 fi
 
-# download all of the images and output their names
-/bin/rm -f pulled-images.txt
-for image in "${image_names[@]}"; do
-  echo "Pulling image: ${image}"
-  echo "${image}" >> pulled-images.txt
-  if ! docker pull "${image}"; then
-    echo "ERROR: Failed to pull image: ${image}" >&2
-    continue
-  fi
-done
+# Download all of the images, PULL_PARALLELISM (default 4) at a time, and
+# output their names. Several suites can resolve to the same image, which is
+# only pulled once.
+pull_images "${image_names[@]}"
+
+# Restore the suite duration and timings history from previous runs, so that
+# run_notebooks.sh can order suites and detect slowdowns. These files are
+# uploaded again with the rest of the test output below.
+if [[ -n "${REGRESSION_TEST_OUTPUT_BUCKET}" ]]; then
+  for history_file in suite-durations.tsv timings.sqlite; do
+    aws s3 cp "s3://${REGRESSION_TEST_OUTPUT_BUCKET}/${history_file}" \
+        "test/output/${history_file}" \
+      || echo "No ${history_file} found from previous runs"
+  done
+fi
 
 ## run the tests
 RUN_ARGS="--dynamic"
@@ -0,0 +1,77 @@
+"""Check that the `pip:` requirements of a conda environment file are installed.
+
+Test suite images install each suite's `environment.yaml` into the base
+environment with `micromamba install -f`. This script is run in the same
+image layer, so the build fails if any package listed under `pip:` is missing,
+or is installed with a different version than the one pinned with `==`.
+
+This script only uses the Python standard library, so it only understands the
+simple `- name==version` list entries used by the test suite environments.
+
+Usage:
+
+    python check_pip_requirements.py <suite>/environment.yaml
+
+"""
+
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+import re
+import sys
+
+REQUIREMENT_PATTERN = re.compile(
+    r'^(?P<name>[A-Za-z0-9][A-Za-z0-9._-]*)\s*(==\s*(?P<version>[^\s;#]+))?'
+)
+
+
+def get_pip_requirements(environment_file: Path) -> list[tuple[str, str | None]]:
+    """Return the name and pinned version, if any, of each requirement listed
+    under `pip:` in a conda environment file.
+
+    """
+    requirements = []
+    pip_indent = None
+
+    for line in environment_file.read_text(encoding='utf-8').splitlines():
+        stripped = line.split('#', 1)[0].strip()
+        indent = len(line) - len(line.lstrip())
+
+        if not stripped:
+            continue
+
+        if stripped == '- pip:':
+            pip_indent = indent
+        elif pip_indent is not None and indent > pip_indent and stripped[0] == '-':
+            match = REQUIREMENT_PATTERN.match(stripped[1:].strip())
+            if match is not None:
+                requirements.append((match['name'], match['version']))
+        else:
+            pip_indent = None
+
+    return requirements
+
+
+def main() -> int:
+    environment_file = Path(sys.argv[1])
+    failures = []
+
+    for name, pinned_version in get_pip_requirements(environment_file):
+        try:
+            installed_version = version(name)
+        except PackageNotFoundError:
+            failures.append(f'{name} is not installed')
+            continue
+
+        if pinned_version is not None and installed_version != pinned_version:
+            failures.append(
+                f'{name} {installed_version} is installed, not {pinned_version}'
+            )
+
+    for failure in failures:
+        print(f'{environment_file} pip requirement: {failure}', file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
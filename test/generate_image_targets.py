@@ -0,0 +1,185 @@
+"""Generate the Docker image build targets for every regression test suite.
+
+The test suites are the union of the suites listed in the
+`config/services_tests_config_*.json` files. For each suite, the notebook is
+the only `.ipynb` file in the suite directory, and the `shared_utils`
+directory is included in the image if that notebook refers to it.
+
+Each suite image is built on a base image containing only pip, from
+`base-environment.yaml`, and the Python version pinned by the suite's
+`environment.yaml`, so that installing the suite environment does not
+re-solve Python. One base image is built for each pinned Python version.
+
+The `make` format writes a Makefile fragment, included by `test/Makefile`,
+with one `base-image-<python version>` target per Python version, one
+`<suite>-image` target per suite, a `base-image` target that builds all of the
+base images and an `images` target that builds all of the suite images. The
+`json` format writes the list of suites, and the `python-versions` format the
+list of base image Python versions, used as the matrices of the
+`build-all-images.yml` workflow.
+
+This script only uses the Python standard library.
+
+Usage:
+
+    python generate_image_targets.py make [--output images.mk]
+    python generate_image_targets.py json
+    python generate_image_targets.py python-versions
+
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+import json
+import re
+import sys
+
+TEST_DIRECTORY = Path(__file__).resolve().parent
+CONFIG_DIRECTORY = TEST_DIRECTORY.parent / 'config'
+
+IMAGE_REPOSITORY = 'ghcr.io/nasa/regression-tests'
+BASE_IMAGE_REPOSITORY = f'{IMAGE_REPOSITORY}-base'
+
+# Matches `- python=3.12` in an environment file, but not, e.g.,
+# `- python-dateutil=2.8.2`.
+PYTHON_PIN_PATTERN = re.compile(r'^\s*-\s*python\s*==?\s*([0-9][0-9.]*)\s*$', re.M)
+
+
+def get_test_suites(config_directory: Path = CONFIG_DIRECTORY) -> list[str]:
+    """Return the names of all test suites referred to by any of the
+    services configuration files, in alphabetical order.
+
+    """
+    test_suites = set()
+
+    for config_file in sorted(config_directory.glob('services_tests_config_*.json')):
+        with open(config_file) as file_handler:
+            for suite_list in json.load(file_handler).values():
+                test_suites.update(
+                    suite.strip() for suite in suite_list.split(',') if suite.strip()
+                )
+
+    return sorted(test_suites)
+
+
+def get_python_version(test_suite: str) -> str:
+    """Return the Python version pinned in the `environment.yaml` of a test
+    suite, exactly as it is written there, e.g., "3.11" or "3.11.10".
+
+    """
+    environment_file = TEST_DIRECTORY / test_suite / 'environment.yaml'
+    python_pins = PYTHON_PIN_PATTERN.findall(
+        environment_file.read_text(encoding='utf-8')
+    )
+
+    if len(python_pins) != 1:
+        raise ValueError(
+            f'Expected one Python version pin in test/{test_suite}/environment.yaml, '
+            f'found {len(python_pins)}'
+        )
+
+    return python_pins[0]
+
+
+def get_image_target(test_suite: str) -> dict[str, str]:
+    """Describe the image for a test suite: its name, notebook, whether it
+    includes the `shared_utils` directory and the Python version of its base
+    image.
+
+    """
+    notebooks = sorted((TEST_DIRECTORY / test_suite).glob('*.ipynb'))
+
+    if len(notebooks) != 1:
+        raise ValueError(
+            f'Expected one notebook in test/{test_suite}, found {len(notebooks)}'
+        )
+
+    shared_utils = 'shared_utils' in notebooks[0].read_text(encoding='utf-8')
+
+    return {
+        'image': test_suite,
+        'notebook': notebooks[0].name,
+        'shared-utils': str(shared_utils).lower(),
+        'python-version': get_python_version(test_suite),
+    }
+
+
+def get_python_versions(image_targets: list[dict[str, str]]) -> list[str]:
+    """Return the distinct Python versions of the base images, in order."""
+    return sorted(
+        {target['python-version'] for target in image_targets},
+        key=lambda python_version: [int(part) for part in python_version.split('.')],
+    )
+
+
+def format_makefile(image_targets: list[dict[str, str]]) -> str:
+    """Write a Makefile rule for each image, and an `images` rule that
+    depends on all of them.
+
+    """
+    rules = [
+        '# Generated by generate_image_targets.py from '
+        'config/services_tests_config_*.json. Do not edit.\n'
+    ]
+    python_versions = get_python_versions(image_targets)
+
+    for python_version in python_versions:
+        rules.append(
+            f'base-image-{python_version}: Dockerfile base-environment.yaml\n'
+            f'\tdocker build -t {BASE_IMAGE_REPOSITORY}:python{python_version} '
+            '-f ./Dockerfile \\\n'
+            f'\t--build-arg python_version={python_version} --target base .\n'
+        )
+
+    for target in image_targets:
+        image = target['image']
+        python_version = target['python-version']
+        rules.append(
+            f'{image}-image: Dockerfile check_pip_requirements.py '
+            f'base-image-{python_version} {image}/environment.yaml\n'
+            f'\tdocker build -t {IMAGE_REPOSITORY}-{image}:latest -f ./Dockerfile \\\n'
+            f'\t--build-arg base_image={BASE_IMAGE_REPOSITORY}:python{python_version} \\\n'
+            f'\t--build-arg notebook={target["notebook"]} --build-arg sub_dir={image} \\\n'
+            f'\t--build-arg shared_utils={target["shared-utils"]} .\n'
+        )
+
+    base_image_rules = ' '.join(
+        f'base-image-{python_version}' for python_version in python_versions
+    )
+    rules.append(f'base-image: {base_image_rules}\n')
+    image_rules = ' \\\n\t'.join(f'{target["image"]}-image' for target in image_targets)
+    rules.append(f'images: {image_rules}\n')
+    rules.append(
+        f'.PHONY: base-image {base_image_rules} images '
+        + ' '.join(f'{target["image"]}-image' for target in image_targets)
+        + '\n'
+    )
+
+    return '\n'.join(rules)
+
+
+def main() -> int:
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('format', choices=['make', 'json', 'python-versions'])
+    parser.add_argument('--output', type=Path, help='Defaults to standard output.')
+    args = parser.parse_args()
+
+    image_targets = [get_image_target(suite) for suite in get_test_suites()]
+
+    if args.format == 'make':
+        output = format_makefile(image_targets)
+    elif args.format == 'python-versions':
+        output = json.dumps(get_python_versions(image_targets)) + '\n'
+    else:
+        output = json.dumps(image_targets) + '\n'
+
+    if args.output is None:
+        sys.stdout.write(output)
+    else:
+        args.output.write_text(output)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
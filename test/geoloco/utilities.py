@@ -3,12 +3,12 @@ Common utility functions used by the geoloco regression tests.
 """
 
 import os
-from pyhdf.SD import SD, SDC
-import numpy
 
 from harmony import Client, Request
 from harmony.harmony import ProcessingFailedException
 
+from hdf4_comparison import compare_hdf4_files
+
 
 def submit_and_download(
     harmony_client: Client, request: Request, file_indicator: str
@@ -44,40 +44,6 @@ def submit_and_download(
     return output_filename
 
 
-def get_dim_sizes(file: str) -> list[int]:
-    ydim = None
-    xdim = None
-    file_SD = SD(file, SDC.READ)
-    datasets = file_SD.datasets()
-    if len(datasets) > 0:
-        dataset_names = datasets.keys()
-        for name in dataset_names:
-            dataset = file_SD.select(name)
-            dims = dataset.dimensions(full=1)
-            ydim = list(dims.values())[0][0]
-            xdim = list(dims.values())[1][0]
-
-    file_SD.end()
-    return [ydim, xdim]
-
-
-def get_sds_data(file: str):
-    sds_data = None
-    file_SD = SD(file, SDC.READ)
-    datasets = file_SD.datasets()
-
-    if len(datasets) > 0:
-        dataset_names = datasets.keys()
-        for name in dataset_names:
-            if name == 'Cloud_Mask':
-                print('Obtaining ', name, ' data')
-                dataset = file_SD.select(name)
-                sds_data = dataset.get()
-
-    file_SD.end()
-    return sds_data
-
-
 def remove_results_files() -> None:
     """Remove all HDF-4 files downloaded during the Geoloco
     regression tests.
@@ -100,21 +66,17 @@ def print_success(success_string: str) -> str:
     print(f'\033[92mSuccess: {success_string}\033[0m')
 
 
-def compare_dimensions(reference_dim_file: str, test_file: str) -> bool:
-    """Compares two data dimension sizes"""
-    reference_dim_sizes = get_dim_sizes(reference_dim_file)
-    test_dim_sizes = get_dim_sizes(test_file)
-    if reference_dim_sizes == test_dim_sizes:
-        return True
-    else:
-        return False
+def compare_data(reference_file: str, test_file: str) -> bool:
+    """Compares the first two dimension sizes of the last SDS, and the
+    Cloud_Mask data, in two HDF-4 files, opening each file once.
+
+    """
+    report = compare_hdf4_files(
+        reference_file, test_file, sds_names=['Cloud_Mask'], compare_dimensions=True
+    )
+
+    for dataset_name, mismatch in report.items():
+        print(f'{dataset_name}: {mismatch}')
 
+    return len(report) == 0
 
-def compare_data(reference_file: str, test_file: str) -> bool:
-    """Compares two data dimension sizes"""
-    reference_data = get_sds_data(reference_file)
-    test_data = get_sds_data(test_file)
-    if numpy.array_equal(reference_data, test_data):
-        return True
-    else:
-        return False
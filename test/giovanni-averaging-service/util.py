@@ -1,57 +1,153 @@
 "Utility functions for comparing csv and geotiff data produced by a harmony request to their reference files"
 
-import rasterio
+import csv
+import warnings
+
 import numpy as np
-import pandas as pd
-import pandas.testing as pdt
+import rasterio
 from typing import List, Tuple
-from io import StringIO
-
-
-def split_csv_header_and_data(csv_rows: List[str]) -> Tuple[List[str], List[str]]:
-    """This is a helper function which splits an area averaged time series CSV into its data header and the data itself"""
-    for i, row in enumerate(csv_rows):
-        if row.strip() == ",":
-            csv_header = csv_rows[: i + 1]
-            csv_data = csv_rows[i + 1 :]
-            return csv_header, csv_data
-    raise ValueError(
-        "CSV does not contain a heading separator line with only ',' so the data cannot be compared"
-    )
 
+from raster_comparison import assert_rasters_equal
+
+
+def read_csv_header_and_data(
+    file_path: str,
+) -> Tuple[List[str], List[str], np.ndarray]:
+    """This is a helper function which reads an area averaged time series CSV in a single
+    parser pass. It returns the lines of the data header, the column names and a structured
+    array of the data, with fields "f0", "f1", etc. for each column. Columns that are numeric
+    in the first data row are parsed as floats, and all other columns as strings"""
+    with open(file_path, "r") as file_handler:
+        csv_header = []
+        while row := file_handler.readline():
+            csv_header.append(row)
+            if row.strip() == ",":
+                break
+        else:
+            raise ValueError(
+                "CSV does not contain a heading separator line with only ',' so the data cannot be compared"
+            )
+
+        column_names = next(csv.reader([file_handler.readline()]), [])
+        data_start = file_handler.tell()
+        first_row = next(csv.reader([file_handler.readline()]), [])
+
+        if len(first_row) == len(column_names):
+            column_types = ["f8" if _is_float(value) else "O" for value in first_row]
+        else:
+            column_types = ["O"] * len(column_names)
 
-def assert_csv_equal(new_file_path: str, reference_file_path: str):
-    """This function checks that the data header and data itself for an area averaged time series CSV matches a reference CSV"""
-    with open(new_file_path, "r") as new_file:
-        new_file_lines = new_file.readlines()
-    with open(reference_file_path, "r") as reference_file:
-        reference_file_lines = reference_file.readlines()
+        try:
+            csv_data = _load_csv_data(file_handler, data_start, column_types)
+        except ValueError:
+            # A later row has a non-numeric (e.g., empty) value in a numeric column
+            csv_data = _load_csv_data(
+                file_handler, data_start, ["O"] * len(column_names)
+            )
 
-    new_file_header, new_file_data = split_csv_header_and_data(new_file_lines)
-    reference_file_header, reference_file_data = split_csv_header_and_data(
-        reference_file_lines
+    return csv_header, column_names, csv_data
+
+
+def assert_csv_equal(
+    new_file_path: str,
+    reference_file_path: str,
+    rtol: float = 1e-05,
+    atol: float = 1e-08,
+):
+    """This function checks that the data header and data itself for an area averaged time series CSV matches a reference CSV.
+    Numeric columns are compared together within a tolerance, all other columns must match exactly, and the indices of any
+    mismatching data rows are reported"""
+    new_file_header, new_columns, new_data = read_csv_header_and_data(new_file_path)
+    reference_file_header, reference_columns, reference_data = read_csv_header_and_data(
+        reference_file_path
     )
 
     assert (
         new_file_header == reference_file_header
     ), "The CSV data header does not match the header in the reference CSV data file"
 
-    new_file_df = pd.read_csv(StringIO("".join(new_file_data)))
-    reference_file_df = pd.read_csv(StringIO("".join(reference_file_data)))
-
-    for col in new_file_df.columns:
-        pdt.assert_series_equal(
-            new_file_df[col],
-            reference_file_df[col],
-            check_dtype=False,
-            rtol=1e-05,
-            atol=1e-08,
-            check_names=True,
-            check_index=False,
-            obj=f"Column {col}",
+    missing_columns = [col for col in new_columns if col not in reference_columns]
+    assert (
+        not missing_columns
+    ), f"Columns {missing_columns} are not in the reference CSV data file"
+
+    assert (
+        new_data.shape[0] == reference_data.shape[0]
+    ), f"CSV has {new_data.shape[0]} data rows, reference CSV has {reference_data.shape[0]}"
+
+    new_numeric, reference_numeric, numeric_columns = [], [], []
+    mismatched = np.zeros((new_data.shape[0], len(new_columns)), dtype=bool)
+
+    for index, col in enumerate(new_columns):
+        new_values = new_data[f"f{index}"]
+        reference_values = reference_data[f"f{reference_columns.index(col)}"]
+        new_floats = _as_float(new_values)
+        reference_floats = _as_float(reference_values)
+
+        if new_floats is not None and reference_floats is not None:
+            new_numeric.append(new_floats)
+            reference_numeric.append(reference_floats)
+            numeric_columns.append(index)
+        else:
+            mismatched[:, index] = new_values != reference_values
+
+    if numeric_columns:
+        mismatched[:, numeric_columns] = ~np.isclose(
+            np.column_stack(new_numeric),
+            np.column_stack(reference_numeric),
+            rtol=rtol,
+            atol=atol,
+            equal_nan=True,
+        )
+
+    mismatched_rows = np.flatnonzero(mismatched.any(axis=1))
+    assert mismatched_rows.size == 0, (
+        f"{mismatched_rows.size} CSV data rows differ from the reference CSV data file, "
+        f"in columns {[new_columns[i] for i in np.flatnonzero(mismatched.any(axis=0))]}, "
+        f"at row indices {mismatched_rows[:10].tolist()}"
+        f"{' (first 10 shown)' if mismatched_rows.size > 10 else ''}"
+    )
+
+
+def _load_csv_data(
+    file_handler, data_start: int, column_types: List[str]
+) -> np.ndarray:
+    """Parse the data rows of a CSV, from the specified file position, into a structured array"""
+    file_handler.seek(data_start)
+
+    with warnings.catch_warnings():
+        # An empty data section is compared as zero rows
+        warnings.simplefilter("ignore", UserWarning)
+        return np.loadtxt(
+            file_handler,
+            delimiter=",",
+            quotechar='"',
+            comments=None,
+            ndmin=1,
+            dtype=[(f"f{index}", dtype) for index, dtype in enumerate(column_types)],
         )
 
 
+def _is_float(value: str) -> bool:
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _as_float(column: np.ndarray) -> np.ndarray | None:
+    """Return a column as floats, treating empty values as NaN, or return None if the
+    column is not numeric"""
+    if column.dtype.kind == "f":
+        return column
+
+    try:
+        return np.where(column == "", "nan", column).astype(np.float64)
+    except ValueError:
+        return None
+
+
 def assert_geotiff_equal(new_file_path: str, reference_file_path: str):
     """This function checks that the relevant metadata and data array for a time averaged map geotiff matches a reference geotiff"""
     with rasterio.open(new_file_path) as new_file, rasterio.open(
@@ -74,10 +170,5 @@ def assert_geotiff_equal(new_file_path: str, reference_file_path: str):
             new_file.height == reference_file.height
         ), "Height differs from reference file"
 
-        # Compare array values
-        for i in range(1, new_file.count + 1):
-            new_array = new_file.read(i)
-            reference_array = reference_file.read(i)
-            assert np.allclose(
-                new_array, reference_array, rtol=1e-05, atol=1e-08, equal_nan=True
-            ), f"Band {i} differs from reference file more than allowed tolerance"
+    # Compare array values, one block at a time
+    assert_rasters_equal(new_file_path, reference_file_path, rtol=1e-05, atol=1e-08)
@@ -1,7 +1,13 @@
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import http.client as http_client
 import logging
+import queue
+import threading
 from datetime import datetime
-from time import sleep
+from math import ceil, prod
+from tempfile import NamedTemporaryFile
+from urllib.parse import urljoin
 import json
 
 from io import BytesIO
@@ -13,12 +19,16 @@ import numpy as np
 import pystac
 
 import requests
-from cachecontrol import CacheController, CacheControlAdapter
+from cachecontrol import CacheController
+
+from .http_cache import CountingCacheControlAdapter, SQLiteCache
 
 
 def _build_session():
     """Builds a requests session that caches responses where possible, making redirects faster.
 
+    Responses are cached in a size- and age-bounded SQLite cache, see http_cache.py.
+
     Returns:
         requests.Session -- A shared session to use for the notebook
     """
@@ -26,7 +36,7 @@ def _build_session():
 
     # Set up caching.  Particularly obey and cache 307 redirects to avoid duplicate expensive calls when we already
     # have a result
-    cache_adapter = CacheControlAdapter()
+    cache_adapter = CountingCacheControlAdapter(cache=SQLiteCache())
     cache_adapter.controller = CacheController(
         cache=cache_adapter.cache, status_codes=(200, 203, 300, 301, 307)
     )
@@ -39,6 +49,26 @@ def _build_session():
 # Session accessible by callers
 session = _build_session()
 
+# NetCDF variables are decimated to roughly this many values before plotting.
+MAX_DISPLAY_POINTS = 4_000_000
+
+# Responses are written to temporary files in chunks of this many bytes.
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+# The number of STAC catalogs and items fetched at once by walk_stac.
+STAC_MAX_WORKERS = 8
+
+
+def http_cache_stats():
+    """Prints and returns the hit, miss, entry and byte counts of the shared session's response cache
+
+    Returns:
+        dict -- The cache statistics
+    """
+    stats = session.get_adapter('https://').cache.stats()
+    print('HTTP cache:', ', '.join(f'{name}: {value}' for name, value in stats.items()))
+    return stats
+
 
 def debug_http():
     """Adds debugging output to HTTP requests to show redirects, headers, etc"""
@@ -55,14 +85,18 @@ def request(*args, **kwargs):
 
     See https://requests.readthedocs.io/en/master/api/#requests.Request for args
 
+    Keyword Arguments:
+        stream {bool} -- If True, the response body is not downloaded until it is read (default: {False})
+
     Returns:
         requests.Response -- The response to the request
     """
+    stream = kwargs.pop('stream', False)
     req = requests.Request(*args, **kwargs)
     prepped = session.prepare_request(req)
 
     print('%s %s' % (prepped.method, prepped.path_url))
-    response = session.send(prepped)
+    response = session.send(prepped, stream=stream)
     # print('Received %s' % (response.headers.get('Content-Type', 'unknown content',)))
     return response
 
@@ -96,6 +130,10 @@ def show(response, varList=[], color_index=None, immediate=True):
     into a single colored image, ESRI Shapefiles with basemaps, and any type of image that can be
     read by PIL, including GeoTIFF
 
+    NetCDF responses are written to a temporary file, so that only the values that are plotted are
+    read, decimated to around MAX_DISPLAY_POINTS values per variable. Requesting NetCDF output with
+    `get(..., stream=True)` avoids holding the whole response body in memory.
+
     Arguments:
         response {requests.Response} -- The response containing the data to display
         varList {array} -- If set, only plot the variables listed in varList.  Otherwise, plot all.
@@ -108,7 +146,6 @@ def show(response, varList=[], color_index=None, immediate=True):
 
     # show_netcdf (look at dimensions, decide how to display); show_image
     plt.rcParams['figure.figsize'] = [16, 8]
-    arrays = []
 
     check_status(response)
     content_type = response.headers['Content-Type']
@@ -129,37 +166,7 @@ def show(response, varList=[], color_index=None, immediate=True):
         or content_type == 'binary/octet-stream'
         or content_type == 'application/octet-stream'
     ):
-        # Show NetCDF4
-        data = H5File(BytesIO(response.content), 'r')
-
-        # If user didn't provide any specific vars to plot, pull all of them into varList
-        if len(varList) == 0:
-            varList = data.keys()
-            print(varList)
-
-        # Plot the variables requested
-        for var in varList:
-            if var in data and len(data[var].shape) > 0:
-                ds = data[var]
-                if len(data[var].shape) < 3:
-                    # Simple plot for 1D or 2D
-                    np_data = ds[()]
-                    plt.plot(np_data)
-                    plt.show()
-                else:
-                    # Setup for 3D display
-                    # ds = data[var]
-                    values = np.flip(ds[0, :], 0)
-                    where = values != ds.attrs.get('_FillValue', None)
-                    scale = ds.attrs.get('scale_factor', [1])[0]
-                    offset = ds.attrs.get('add_offset', [0])[0]
-                    array = np.where(where, values * scale + offset, values)
-                    arrays.append(array)
-            else:
-                print('Error: ', var, 'not found in dataset')
-        if len(arrays) != 0:
-            # plot the 3D data
-            plt.imshow(np.dstack(arrays))
+        _show_netcdf(response, varList)
     elif content_type in ['application/zip', 'application/shapefile+zip']:
         print('Unused shapefile display function removed in PR #282')
     elif 'application/json' in content_type:
@@ -171,21 +178,113 @@ def show(response, varList=[], color_index=None, immediate=True):
         if color_index is None:
             plt.imshow(Image.open(BytesIO(response.content)))
         else:
-            gray_image = Image.open(BytesIO(response.content))
             # Move 1-channel green_var TIFF to second channel of RGB
-            image = Image.new('RGB', gray_image.size)
-            # There's probably a better way to do this with numpy
-            if color_index == 0:
-                image.putdata([(g, 0, 0) for g in gray_image.getdata()])
-            if color_index == 1:
-                image.putdata([(0, g, 0) for g in gray_image.getdata()])
-            if color_index == 2:
-                image.putdata([(0, 0, g) for g in gray_image.getdata()])
-            plt.imshow(image)
+            gray_image = Image.open(BytesIO(response.content))
+            plt.imshow(_colorize(gray_image, color_index))
     if immediate:
         plt.show()
 
 
+def _show_netcdf(response, varList):
+    """Plot the requested variables of a NetCDF response, reading only a
+    decimated selection of each variable from a temporary copy of the file.
+
+    """
+    with NamedTemporaryFile(suffix='.nc') as netcdf_file:
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+            netcdf_file.write(chunk)
+
+        netcdf_file.flush()
+
+        with H5File(netcdf_file.name, 'r') as data:
+            # If user didn't provide any specific vars to plot, pull all of them into varList
+            if len(varList) == 0:
+                varList = data.keys()
+                print(varList)
+
+            arrays = []
+
+            # Plot the variables requested
+            for var in varList:
+                if var in data and len(data[var].shape) > 0:
+                    ds = data[var]
+                    if len(data[var].shape) < 3:
+                        # Simple plot for 1D or 2D
+                        np_data = ds[_decimated_selection(ds.shape)]
+                        plt.plot(np_data)
+                        plt.show()
+                    else:
+                        # Setup for 3D display
+                        arrays.append(ds)
+                else:
+                    print('Error: ', var, 'not found in dataset')
+            if len(arrays) != 0:
+                # plot the 3D data
+                plt.imshow(_stack_bands(arrays))
+
+
+def _decimated_selection(shape):
+    """A selection of every nth value along each dimension, using the same
+    step for all dimensions, that contains no more than MAX_DISPLAY_POINTS
+    values.
+
+    """
+    step = 1
+    while prod(ceil(size / step) for size in shape) > MAX_DISPLAY_POINTS:
+        step += 1
+
+    return tuple(slice(None, None, step) for _ in shape)
+
+
+def _stack_bands(datasets):
+    """Stack the first time slice of each 3D variable into the bands of an
+    image, flipped vertically, with scale_factor and add_offset applied to all
+    values other than the _FillValue. Only a decimated selection of each slice
+    is read, and each band is scaled directly into a single preallocated
+    array, rather than stacking separately scaled copies.
+
+    """
+    selection = (0,) + _decimated_selection(datasets[0].shape[1:])
+    bands = [np.flip(ds[selection], 0) for ds in datasets]
+    scales = [ds.attrs.get('scale_factor', [1])[0] for ds in datasets]
+    offsets = [ds.attrs.get('add_offset', [0])[0] for ds in datasets]
+    stacked = np.empty(
+        bands[0].shape + (len(bands),), dtype=np.result_type(*bands, *scales, *offsets)
+    )
+
+    for index, (ds, values) in enumerate(zip(datasets, bands)):
+        band = stacked[..., index]
+        np.multiply(values, scales[index], out=band)
+        band += offsets[index]
+
+        fill_value = ds.attrs.get('_FillValue', None)
+        if fill_value is not None:
+            np.copyto(band, values, where=values == fill_value)
+
+    return stacked
+
+
+def _colorize(gray_image, color_index):
+    """Put a single-band image into one channel of an RGB image (0=red,
+    1=green, 2=blue), leaving the other channels black. Values outside the
+    range 0-255 are clipped.
+
+    """
+    if gray_image.mode == '1':
+        gray_image = gray_image.convert('L')
+
+    values = np.asarray(gray_image)
+    if values.dtype != np.uint8:
+        values = np.clip(values, 0, 255).astype(np.uint8)
+
+    channel = Image.fromarray(values)
+    black = Image.new('L', gray_image.size)
+
+    return Image.merge(
+        'RGB', [channel if index == color_index else black for index in range(3)]
+    )
+
+
 def get_data_urls(response):
     """Returns the data URLs in an async response
 
@@ -202,6 +301,156 @@ def get_data_urls(response):
     ]
 
 
+JOB_TERMINAL_STATUSES = ['successful', 'failed', 'canceled']
+
+
+def _job_snapshot(body):
+    """Returns the parts of an async job body that, when changed, should be
+    reported to a poller callback: status, progress and number of links.
+    """
+    return (body['status'], body['progress'], len(body.get('links', [])))
+
+
+def _next_poll_interval(
+    interval, progress_delta, elapsed, progress, min_interval, max_interval
+):
+    """Computes how long to wait before polling a job again
+
+    When progress has advanced, the next poll is scheduled at a quarter of the
+    estimated time remaining, based on the observed rate of progress. When
+    progress has stalled, the previous interval is doubled.
+
+    Returns:
+        float -- The number of seconds to wait, clamped to [min_interval, max_interval]
+    """
+    if progress_delta > 0 and elapsed > 0:
+        remaining = (100 - progress) * elapsed / progress_delta
+        interval = remaining / 4
+    else:
+        interval = interval * 2
+
+    return min(max(interval, min_interval), max_interval)
+
+
+async def _poll_job(job_url, on_update, min_interval, max_interval):
+    """Polls a single job URL until it reaches a terminal status
+
+    Arguments:
+        job_url {string} -- The URL of the Harmony job status endpoint
+        on_update {function} -- Called with (job_url, response) when the job changes
+
+    Returns:
+        response.Response -- the response from the final successful or failed poll
+    """
+    loop = asyncio.get_running_loop()
+    interval = min_interval
+    previous_body = None
+    previous_poll = loop.time()
+
+    while True:
+        response = await asyncio.to_thread(session.get, job_url)
+        check_status(response)
+        body = response.json()
+        now = loop.time()
+
+        if previous_body is None or _job_snapshot(body) != _job_snapshot(previous_body):
+            on_update(job_url, response)
+
+        if body['status'] in JOB_TERMINAL_STATUSES:
+            return response
+
+        if previous_body is not None:
+            interval = _next_poll_interval(
+                interval,
+                body['progress'] - previous_body['progress'],
+                now - previous_poll,
+                body['progress'],
+                min_interval,
+                max_interval,
+            )
+
+        previous_body = body
+        previous_poll = now
+        await asyncio.sleep(interval)
+
+
+async def poll_jobs(job_urls, on_update, min_interval=0.5, max_interval=30):
+    """Concurrently polls many Harmony job URLs over the shared session
+
+    Each job is polled with an adaptive interval: quickly while progress is
+    advancing towards completion, and backing off while progress stalls.
+
+    Arguments:
+        job_urls {string[]} -- The URLs of the Harmony job status endpoints
+        on_update {function} -- Called with (job_url, response) on the first poll of
+          each job, and whenever its status, progress or links change
+
+    Keyword Arguments:
+        min_interval {number} -- The shortest time between polls of one job (default: {0.5})
+        max_interval {number} -- The longest time between polls of one job (default: {30})
+
+    Returns:
+        dict -- A mapping of each job URL to the response from its final poll
+    """
+    final_responses = await asyncio.gather(
+        *[
+            _poll_job(job_url, on_update, min_interval, max_interval)
+            for job_url in job_urls
+        ]
+    )
+    return dict(zip(job_urls, final_responses))
+
+
+def watch_jobs(job_urls, on_update, min_interval=0.5, max_interval=30):
+    """Blocking wrapper around poll_jobs that is safe to call from a notebook
+
+    The event loop runs in a background thread, as the notebook kernel already
+    owns a running loop. Updates are queued and on_update is called from the
+    calling thread, so any plots it produces are displayed in the current cell.
+
+    Arguments:
+        job_urls {string[]} -- The URLs of the Harmony job status endpoints
+        on_update {function} -- Called with (job_url, response) when a job changes
+
+    Keyword Arguments:
+        min_interval {number} -- The shortest time between polls of one job (default: {0.5})
+        max_interval {number} -- The longest time between polls of one job (default: {30})
+
+    Returns:
+        dict -- A mapping of each job URL to the response from its final poll
+    """
+    updates = queue.Queue()
+    outcome = {}
+    finished = object()
+
+    def run_poller():
+        try:
+            outcome['responses'] = asyncio.run(
+                poll_jobs(
+                    job_urls,
+                    lambda job_url, response: updates.put((job_url, response)),
+                    min_interval,
+                    max_interval,
+                )
+            )
+        except Exception as exception:
+            outcome['error'] = exception
+        finally:
+            updates.put(finished)
+
+    poller = threading.Thread(target=run_poller, daemon=True)
+    poller.start()
+
+    for update in iter(updates.get, finished):
+        on_update(*update)
+
+    poller.join()
+    if 'error' in outcome:
+        raise outcome['error']
+
+    return outcome['responses']
+
+
 def show_async(response, varList=[]):
     """Shows an asynchronous Harmony response.
 
@@ -216,34 +465,24 @@ def show_async(response, varList=[]):
     Returns:
         response.Response -- the response from the final successful or failed poll
     """
+    displayed_link_count = 0
 
-    def show_response(response, link_count):
+    def show_response(job_url, response):
+        nonlocal displayed_link_count
         print('Async response at', datetime.now().strftime("%H:%M:%S"))
         print(json.dumps(response.json(), indent=2))
         links = get_data_urls(response)
-        new_links = links[slice(link_count, None)]
+        new_links = links[slice(displayed_link_count, None)]
         for link in new_links:
             if link.startswith('http'):
                 show(get(link), varList)
-        return len(links)
+        displayed_link_count = len(links)
+        if response.json()['status'] not in JOB_TERMINAL_STATUSES:
+            print('Waiting for updates...')
 
     check_status(response)
-    displayed_link_count = 0
+    response = watch_jobs([response.url], show_response)[response.url]
     body = response.json()
-    displayed_link_count = show_response(response, displayed_link_count)
-    waiting_message_printed = False
-    while body['status'] not in ['successful', 'failed', 'canceled']:
-        if not waiting_message_printed:
-            print('Waiting for updates...')
-            waiting_message_printed = True
-        sleep(1)
-        progress = body['progress']
-        status = body['status']
-        response = session.get(response.url)
-        body = response.json()
-        if progress != body['progress'] or status != body['status']:
-            displayed_link_count = show_response(response, displayed_link_count)
-            waiting_message_printed = False
 
     assert body['status'] not in ['failed']
     check_stac(response)
@@ -281,37 +520,23 @@ def show_async_condensed(response, varList=[], show_results=True):
         varList {array} -- If set, only plot the variables listed in varList.  Otherwise, plot all.
         show_results {bool} -- True will display the results as they arrive.  (default: {True})
     """
+    displayed_link_count = 0
 
-    def show_response_condensed(response, varList, link_count):
-        links = get_data_urls(response)
-        new_links = links[slice(link_count, None)]
-        for link in new_links:
-            if link.startswith('http'):
-                show(get(link), varList)
-        return len(links)
+    def show_response_condensed(job_url, response):
+        nonlocal displayed_link_count
+        if show_results:
+            links = get_data_urls(response)
+            new_links = links[slice(displayed_link_count, None)]
+            for link in new_links:
+                if link.startswith('http'):
+                    show(get(link), varList)
+            displayed_link_count = len(links)
+        print_async_status(response.json())
 
     check_status(response)
-
-    displayed_link_count = 0
-    body = response.json()
     print('Getting results for request')
-    print_async_status(body)
-    if show_results:
-        displayed_link_count = show_response_condensed(
-            response, varList, displayed_link_count
-        )
-    while body['status'] not in ['successful', 'failed', 'canceled']:
-        sleep(0.5)
-        progress = body['progress']
-        status = body['status']
-        response = session.get(response.url)
-        body = response.json()
-        if progress != body['progress'] or status != body['status']:
-            if show_results:
-                displayed_link_count = show_response_condensed(
-                    response, varList, displayed_link_count
-                )
-            print_async_status(body)
+    response = watch_jobs([response.url], show_response_condensed)[response.url]
+    body = response.json()
 
     assert body['status'] not in ['failed']
     check_stac(response)
@@ -343,15 +568,60 @@ def check_stac(response):
 
     assert stac_url
 
-    cat = pystac.read_file(stac_url)
-
-    for i in cat.get_all_items():
-        assert i.id
-        assert i.datetime
-        assert i.bbox
-        assert i.assets.keys()
+    for item in walk_stac(stac_url):
+        assert item.id
+        assert item.datetime
+        assert item.bbox
+        assert item.assets.keys()
         print('STAC Item')
-        print('\t', 'ID:', i.id)
-        print('\t', 'Date:', i.datetime)
-        print('\t', 'Bounding Box:', i.bbox)
-        print('\t', 'File:', list(i.assets.keys()))
+        print('\t', 'ID:', item.id)
+        print('\t', 'Date:', item.datetime)
+        print('\t', 'Bounding Box:', item.bbox)
+        print('\t', 'File:', list(item.assets.keys()))
+
+
+def walk_stac(stac_url, max_workers=STAC_MAX_WORKERS):
+    """Yields every item in a STAC catalog, fetching child catalogs and items concurrently using the
+      shared session. Each linked document is fetched once, and items are yielded as soon as they are
+      received, so the order of items is not guaranteed.
+
+    Arguments:
+        stac_url {string} -- The URL of the root STAC catalog
+
+    Keyword Arguments:
+        max_workers {number} -- The maximum number of documents to fetch at once (default: {STAC_MAX_WORKERS})
+
+    Returns:
+        Iterator[pystac.Item] -- The items in the catalog
+    """
+    seen_urls = {stac_url}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(_get_stac_json, stac_url): stac_url}
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                url = pending.pop(future)
+                document = future.result()
+
+                if document.get('type') == 'Feature':
+                    yield pystac.Item.from_dict(document, href=url)
+                    continue
+
+                for link in document.get('links', []):
+                    if link.get('rel') not in ('child', 'item'):
+                        continue
+
+                    link_url = urljoin(url, link['href'])
+                    if link_url not in seen_urls:
+                        seen_urls.add(link_url)
+                        pending[executor.submit(_get_stac_json, link_url)] = link_url
+
+
+def _get_stac_json(url):
+    """Fetches a STAC catalog, collection or item using the shared session"""
+    response = session.get(url)
+    check_status(response)
+    return response.json()
@@ -0,0 +1,204 @@
+"""A size- and age-bounded SQLite cache for the notebook helpers session.
+
+The `CacheControl` default `DictCache` keeps every cached response in memory,
+without limit, for the lifetime of the kernel. `SQLiteCache` stores them in
+an SQLite database instead, evicting entries that are older than `max_age`
+seconds and, once the cached responses exceed `max_bytes`, the least recently
+used entries. Responses larger than `max_bytes` are not stored.
+`CountingCacheControlAdapter` counts a hit or a miss once per cacheable
+request, and the counts can be displayed with
+`notebook_helpers.http_cache_stats()`.
+
+By default the database is held in memory. If the `HARMONY_REGRESSION_HTTP_CACHE`
+environment variable is set to a file path, cached redirects and result bodies
+are reused by later kernels and test runs that share that file. The size and
+age limits can be configured with the `HARMONY_REGRESSION_HTTP_CACHE_MAX_BYTES`
+and `HARMONY_REGRESSION_HTTP_CACHE_MAX_AGE` environment variables.
+
+"""
+
+from datetime import datetime, timezone
+from os import environ
+from pathlib import Path
+from threading import Lock
+import sqlite3
+import time
+
+from cachecontrol import CacheControlAdapter
+from cachecontrol.cache import BaseCache
+
+HTTP_CACHE_PATH = environ.get('HARMONY_REGRESSION_HTTP_CACHE', ':memory:')
+
+HTTP_CACHE_MAX_BYTES = int(
+    environ.get('HARMONY_REGRESSION_HTTP_CACHE_MAX_BYTES', 256 * 1024**2)
+)
+
+HTTP_CACHE_MAX_AGE = float(
+    environ.get('HARMONY_REGRESSION_HTTP_CACHE_MAX_AGE', 24 * 60 * 60)
+)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+'''
+
+
+class SQLiteCache(BaseCache):
+    """A `CacheControl` cache backend stored in an SQLite database, with
+    size- and age-based eviction. The cache can be shared by several threads,
+    and by several processes if it is stored in a file.
+
+    """
+
+    def __init__(
+        self,
+        path: str | Path = HTTP_CACHE_PATH,
+        max_bytes: int = HTTP_CACHE_MAX_BYTES,
+        max_age: float = HTTP_CACHE_MAX_AGE,
+    ):
+        if str(path) != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+        self.connection = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        if str(path) != ':memory:':
+            self.connection.execute('PRAGMA journal_mode=WAL')
+
+        self.connection.executescript(SCHEMA)
+
+    def get(self, key: str) -> bytes | None:
+        now = time.time()
+
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT value FROM responses WHERE key = ? AND stored_at >= ? '
+                'AND (expires_at IS NULL OR expires_at > ?)',
+                (key, now - self.max_age, now),
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            self.connection.execute(
+                'UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key)
+            )
+
+        return row[0]
+
+    def set(
+        self, key: str, value: bytes, expires: int | datetime | None = None
+    ) -> None:
+        # Storing a response larger than the whole cache would evict every
+        # other entry, and then the response itself.
+        if len(value) > self.max_bytes:
+            return
+
+        now = time.time()
+
+        if isinstance(expires, datetime):
+            if expires.tzinfo is None:
+                expires = expires.replace(tzinfo=timezone.utc)
+            expires_at = expires.timestamp()
+        elif expires:
+            expires_at = now + expires
+        else:
+            expires_at = None
+
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                (key, value, len(value), now, now, expires_at),
+            )
+            self._evict(now)
+
+    def delete(self, key: str) -> None:
+        with self.lock:
+            self.connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    def record_lookup(self, hit: bool) -> None:
+        """Count one cache hit or miss. `get` does not count them, because
+        `CacheControl` can call it more than once for a single request.
+
+        """
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict[str, int]:
+        """The number of hits, misses, entries and bytes in the cache."""
+        with self.lock:
+            entries, size = self.connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+            ).fetchone()
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': entries,
+            'bytes': size,
+        }
+
+    def _evict(self, now: float):
+        """Remove expired entries, then the least recently used entries until
+        the cache is within its size limit. Called with the lock held.
+
+        """
+        self.connection.execute(
+            'DELETE FROM responses WHERE stored_at < ? OR expires_at <= ?',
+            (now - self.max_age, now),
+        )
+
+        (size,) = self.connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses'
+        ).fetchone()
+
+        if size <= self.max_bytes:
+            return
+
+        evicted_keys = []
+        for key, entry_size in self.connection.execute(
+            'SELECT key, size FROM responses ORDER BY accessed_at'
+        ).fetchall():
+            if size <= self.max_bytes:
+                break
+
+            evicted_keys.append((key,))
+            size -= entry_size
+
+        self.connection.executemany('DELETE FROM responses WHERE key = ?', evicted_keys)
+
+
+class CountingCacheControlAdapter(CacheControlAdapter):
+    """A `CacheControlAdapter` that counts a hit or a miss in its
+    `SQLiteCache` once per cacheable request. Responses served from the
+    cache, including those revalidated with a 304 response, are hits.
+
+    """
+
+    def send(self, request, *args, **kwargs):
+        response = super().send(request, *args, **kwargs)
+        cacheable_methods = kwargs.get('cacheable_methods') or self.cacheable_methods
+
+        if request.method in cacheable_methods and isinstance(self.cache, SQLiteCache):
+            self.cache.record_lookup(getattr(response, 'from_cache', False))
+
+        return response
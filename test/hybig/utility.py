@@ -2,7 +2,8 @@
 
 from pathlib import Path
 import rasterio
-from numpy.testing import assert_array_almost_equal
+
+from raster_comparison import assert_rasters_equal
 
 
 def print_error(error_string: str) -> str:
@@ -24,7 +25,9 @@ def assert_dataset_produced_correct_results(
     metadata read by `rasterio`, such as the CRS and geotransform,
     are retrieved from a sibling `.aux.xml` file, meaning the
     content of the test output and reference files for these
-    siblings is also being tested.
+    siblings is also being tested. The array values are compared
+    one block at a time, to the same precision as
+    `numpy.testing.assert_array_almost_equal`.
 
     """
     with rasterio.open(generated_file) as test_dataset:
@@ -34,9 +37,7 @@ def assert_dataset_produced_correct_results(
             ), f'output {file_type} has incorrect metadata:\nTest Result Metadata ({generated_file}):\n{test_dataset.meta}\nReference Metadata ({reference_file})\n{reference_dataset.meta}'
             print_success('Generated image has correct metadata.')
 
-            ref_image = reference_dataset.read()
-            test_image = test_dataset.read()
-            assert_array_almost_equal(ref_image, test_image)
+    assert_rasters_equal(generated_file, reference_file, rtol=0, atol=1.5e-06)
 
     print_success('Generated image contains correct data.')
 
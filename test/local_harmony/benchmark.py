@@ -0,0 +1,191 @@
+"""Benchmark the client-side hot paths of the regression tests against the
+local Harmony emulator.
+
+Each scenario submits jobs to an in-process emulator (see `emulator.py`) and
+measures the wall-clock time for the routines in `shared_utils/utilities.py`
+and the job pollers in `harmony-regression/notebook_helpers`. The emulator
+options (job duration, latency, failure injection, etc.) are shared with
+`emulator.py`, so the same scenarios can be run under different conditions.
+
+Usage:
+
+    python benchmark.py --jobs 8 --max-concurrent-jobs 4 --job-duration 2
+
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import json
+import os
+import sys
+
+from emulator import add_emulator_arguments, start_emulator, state_from_arguments
+
+TEST_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(TEST_DIR / 'shared_utils'))
+sys.path.append(str(TEST_DIR / 'harmony-regression'))
+
+from harmony import Client, Collection, Environment, Request  # noqa: E402
+from utilities import (  # noqa: E402
+    download_file_from_harmony,
+    submit_and_download,
+    submit_and_download_batch,
+)
+
+SCENARIOS = [
+    'submit_and_download',
+    'submit_and_download_batch',
+    'download_file_from_harmony',
+    'download_file_from_harmony_resumable',
+    'watch_jobs',
+    'show_async_condensed',
+]
+
+
+def benchmark_request(index: int) -> Request:
+    return Request(collection=Collection(id=f'C{index:010d}-EMULATOR'))
+
+
+def run_scenario(
+    scenario: str,
+    harmony_client: Client,
+    root_url: str,
+    jobs: int,
+    max_concurrent_jobs: int,
+    working_dir: Path,
+):
+    """Run a single benchmark scenario for the specified number of jobs."""
+    if scenario == 'submit_and_download':
+        for index in range(jobs):
+            submit_and_download(
+                harmony_client,
+                benchmark_request(index),
+                str(working_dir / f'serial_{index}.out'),
+            )
+    elif scenario == 'submit_and_download_batch':
+        submit_and_download_batch(
+            harmony_client,
+            [
+                (benchmark_request(index), str(working_dir / f'batch_{index}.out'))
+                for index in range(jobs)
+            ],
+            max_concurrent_jobs=max_concurrent_jobs,
+        )
+    elif scenario.startswith('download_file_from_harmony'):
+        job_ids = [
+            harmony_client.submit(benchmark_request(index)) for index in range(jobs)
+        ]
+        for index, job_id in enumerate(job_ids):
+            download_file_from_harmony(
+                harmony_client,
+                job_id,
+                working_dir / f'{scenario}_{index}.out',
+                working_dir=working_dir,
+                resumable=scenario.endswith('resumable'),
+            )
+    elif scenario == 'watch_jobs':
+        from notebook_helpers import get, watch_jobs
+
+        job_urls = [
+            get(benchmark_job_url(root_url, index)).url for index in range(jobs)
+        ]
+        watch_jobs(job_urls, lambda job_url, response: None)
+    elif scenario == 'show_async_condensed':
+        from notebook_helpers import get, show_async_condensed
+
+        for index in range(jobs):
+            show_async_condensed(
+                get(benchmark_job_url(root_url, index)), show_results=False
+            )
+
+
+def local_client(host: str, port: int) -> Client:
+    """Create a `harmony-py` client for the emulator at the specified host
+    and port. `Client` does not accept either, but its `Config` reads them
+    from the `HARMONY_HOSTNAME` and `LOCALHOST_PORT` environment variables
+    before falling back to `localhost:3000` for `Environment.LOCAL`.
+
+    """
+    os.environ['HARMONY_HOSTNAME'] = host
+    os.environ['LOCALHOST_PORT'] = str(port)
+
+    return Client(
+        env=Environment.LOCAL, auth=('emulator', 'emulator'), check_interval=0.5
+    )
+
+
+def benchmark_job_url(root_url: str, index: int) -> str:
+    """The URL the notebook helpers use to submit an asynchronous request."""
+    return (
+        f'{root_url}/C{index:010d}-EMULATOR/ogc-api-coverages/1.0.0/collections/'
+        'all/coverage/rangeset'
+    )
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    add_emulator_arguments(parser)
+    parser.add_argument('--jobs', type=int, default=8)
+    parser.add_argument('--max-concurrent-jobs', type=int, default=4)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--output', type=Path, help='Write results as JSON')
+    arguments = parser.parse_args()
+
+    server = start_emulator(
+        state_from_arguments(arguments), arguments.host, arguments.port
+    )
+    root_url = f'http://{arguments.host}:{arguments.port}'
+    harmony_client = local_client(arguments.host, arguments.port)
+    results = []
+
+    try:
+        for scenario in arguments.scenarios:
+            with TemporaryDirectory() as working_dir:
+                start_time = perf_counter()
+
+                try:
+                    run_scenario(
+                        scenario,
+                        harmony_client,
+                        root_url,
+                        arguments.jobs,
+                        arguments.max_concurrent_jobs,
+                        Path(working_dir),
+                    )
+                    error = None
+                except ImportError as exception:
+                    error = f'skipped: {exception}'
+                except Exception as exception:
+                    error = f'{type(exception).__name__}: {exception}'
+
+                results.append(
+                    {
+                        'scenario': scenario,
+                        'jobs': arguments.jobs,
+                        'seconds': round(perf_counter() - start_time, 3),
+                        'error': error,
+                    }
+                )
+    finally:
+        server.shutdown()
+
+    print(f'\n{"scenario":<40}{"jobs":>6}{"seconds":>10}{"jobs/s":>10}')
+    for result in results:
+        if result['error'] is not None:
+            print(f'{result["scenario"]:<40}{result["error"]}')
+        else:
+            print(
+                f'{result["scenario"]:<40}{result["jobs"]:>6}'
+                f'{result["seconds"]:>10.2f}'
+                f'{result["jobs"] / result["seconds"]:>10.2f}'
+            )
+
+    if arguments.output is not None:
+        with open(arguments.output, 'w', encoding='utf-8') as file_handler:
+            json.dump(results, file_handler, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,494 @@
+"""A lightweight, offline stand-in for the Harmony API.
+
+The emulator serves the subset of Harmony used by `harmony-py` and the
+regression test helpers, so that client-side code paths can be exercised and
+benchmarked without network access or Earthdata Login credentials:
+
+* Job submission via the OGC API - Coverages and EDR routes, redirecting to
+  the job status page, as Harmony does for asynchronous requests.
+* Job status polling at `/jobs/<job_id>`, with progress advancing over time
+  and data links appearing as the job progresses.
+* STAC catalogs and items for each job at `/stac/<job_id>/`.
+* Result files under `/service-results/`, supporting HTTP Range requests and
+  MD5 `ETag` headers.
+
+Result files are taken from the `reference_data` and `reference_files`
+fixtures of the test suites. Latency, job duration, job failures, transient
+HTTP errors, download bandwidth and dropped downloads can all be configured.
+
+Usage:
+
+    python emulator.py --port 3000 --job-duration 5 --failure-rate 0.1
+
+`harmony.Client(env=Environment.LOCAL)` connects to port 3000 by default.
+
+"""
+
+from argparse import ArgumentParser
+from datetime import datetime, timedelta, timezone
+from hashlib import md5
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock, Thread
+from time import monotonic, sleep
+from urllib.parse import urlparse
+from uuid import uuid4
+import json
+import random
+import re
+
+TEST_DIR = Path(__file__).resolve().parent.parent
+
+SUBMIT_ROUTE = re.compile(
+    r'^/([^/]+)/ogc-api-coverages/1\.0\.0/collections/[^/]+/coverage/rangeset$'
+    r'|^/ogc-api-edr/1\.1\.0/collections/([^/]+)/[^/]+$'
+)
+JOB_ROUTE = re.compile(r'^/jobs/([0-9a-f-]{36})$')
+STAC_CATALOG_ROUTE = re.compile(r'^/stac/([0-9a-f-]{36})/?$')
+STAC_ITEM_ROUTE = re.compile(r'^/stac/([0-9a-f-]{36})/(\d+)/?$')
+RESULT_ROUTE = re.compile(r'^/service-results/harmony-emulator/([0-9a-f-]{36})/(\d+)/')
+
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def default_fixtures() -> list[Path]:
+    """All reference files shipped with the regression test suites."""
+    return sorted(
+        fixture
+        for pattern in ['*/reference_data/*', '*/reference_files/*']
+        for fixture in TEST_DIR.glob(pattern)
+        if fixture.is_file() and fixture.name != 'README.md'
+    )
+
+
+class EmulatorState:
+    """Jobs and settings shared by all request handler threads."""
+
+    def __init__(
+        self,
+        fixtures: list[Path],
+        files_per_job: int = 1,
+        queue_time: float = 0.5,
+        job_duration: float = 2.0,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        error_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        bandwidth: float | None = None,
+        seed: int | None = None,
+    ):
+        if not fixtures:
+            raise ValueError('At least one fixture file is required.')
+
+        self.fixtures = fixtures
+        self.files_per_job = files_per_job
+        self.queue_time = queue_time
+        self.job_duration = job_duration
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.bandwidth = bandwidth
+        self.random = random.Random(seed)
+        self.jobs = {}
+        self.etags = {}
+        self.lock = Lock()
+
+    def create_job(self, collection_id: str, request_url: str) -> str:
+        """Record a new job, choosing its result files and final status."""
+        with self.lock:
+            job_index = len(self.jobs)
+            job_id = str(uuid4())
+            self.jobs[job_id] = {
+                'collection_id': collection_id,
+                'request': request_url,
+                'created': monotonic(),
+                'created_at': datetime.now(timezone.utc),
+                'fails': self.random.random() < self.failure_rate,
+                'files': [
+                    self.fixtures[(job_index + offset) % len(self.fixtures)]
+                    for offset in range(self.files_per_job)
+                ],
+            }
+
+        return job_id
+
+    def count_jobs(self) -> int:
+        with self.lock:
+            return len(self.jobs)
+
+    def find_job(self, job_id: str) -> dict | None:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def should_inject_error(self) -> bool:
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def should_drop_download(self) -> bool:
+        with self.lock:
+            return self.random.random() < self.drop_rate
+
+    def get_etag(self, fixture: Path) -> str:
+        """MD5 ETag of a fixture, as S3 reports for single part uploads."""
+        with self.lock:
+            if fixture not in self.etags:
+                self.etags[fixture] = f'"{md5(fixture.read_bytes()).hexdigest()}"'
+
+            return self.etags[fixture]
+
+    def get_job_progress(self, job: dict) -> tuple[str, int]:
+        """Derive a job status and progress from the time since submission."""
+        elapsed = monotonic() - job['created']
+
+        if elapsed < self.queue_time:
+            return 'accepted', 0
+
+        if elapsed < self.queue_time + self.job_duration:
+            progress = int(100 * (elapsed - self.queue_time) / self.job_duration)
+            return 'running', min(progress, 99)
+
+        return ('failed' if job['fails'] else 'successful'), 100
+
+
+class HarmonyRequestHandler(BaseHTTPRequestHandler):
+    """Routes requests to the emulated Harmony endpoints."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'HarmonyEmulator'
+
+    @property
+    def state(self) -> EmulatorState:
+        return self.server.state
+
+    @property
+    def root_url(self) -> str:
+        return f'http://{self.headers.get("Host", "localhost:3000")}'
+
+    def log_message(self, format, *args):
+        """Suppress per-request logging, which would distort benchmarks."""
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        # Discard any form body (e.g. a shapefile) before responding.
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.handle_request()
+
+    def handle_request(self):
+        sleep(self.state.latency)
+        path = urlparse(self.path).path
+
+        if self.command == 'GET' and self.state.should_inject_error():
+            self.send_json({'description': 'Injected error'}, status=503)
+        elif path == '/jobs':
+            self.send_json({'count': self.state.count_jobs(), 'jobs': []})
+        elif match := SUBMIT_ROUTE.match(path):
+            self.submit_job(match.group(1) or match.group(2))
+        elif match := JOB_ROUTE.match(path):
+            self.send_job_status(match.group(1))
+        elif match := STAC_CATALOG_ROUTE.match(path):
+            self.send_stac_catalog(match.group(1))
+        elif match := STAC_ITEM_ROUTE.match(path):
+            self.send_stac_item(match.group(1), int(match.group(2)))
+        elif match := RESULT_ROUTE.match(path):
+            self.send_result_file(match.group(1), int(match.group(2)))
+        else:
+            self.send_json({'description': f'Not found: {path}'}, status=404)
+
+    def submit_job(self, collection_id: str):
+        """Create a job, then redirect to its status page."""
+        job_id = self.state.create_job(collection_id, f'{self.root_url}{self.path}')
+        self.send_response(303)
+        self.send_header('Location', f'{self.root_url}/jobs/{job_id}')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def get_job(self, job_id: str) -> dict | None:
+        job = self.state.find_job(job_id)
+
+        if job is None:
+            self.send_json({'description': f'Job {job_id} not found'}, status=404)
+
+        return job
+
+    def send_job_status(self, job_id: str):
+        """Respond with a Harmony job status document."""
+        job = self.get_job(job_id)
+        if job is None:
+            return
+
+        status, progress = self.state.get_job_progress(job)
+        available_files = (
+            0 if status == 'failed' else len(job['files']) * progress // 100
+        )
+        job_url = f'{self.root_url}/jobs/{job_id}'
+        links = [
+            {
+                'href': self.result_url(job_id, file_index, job['files'][file_index]),
+                'title': job['files'][file_index].name,
+                'type': 'application/octet-stream',
+                'rel': 'data',
+            }
+            for file_index in range(available_files)
+        ]
+
+        if status == 'successful':
+            links.append(
+                {
+                    'href': f'{self.root_url}/stac/{job_id}/',
+                    'title': 'STAC catalog',
+                    'type': 'application/json',
+                    'rel': 'stac-catalog-json',
+                }
+            )
+
+        links.append(
+            {'href': job_url, 'title': 'The current page', 'rel': 'self'},
+        )
+
+        self.send_json(
+            {
+                'username': 'harmony-emulator',
+                'status': status,
+                'message': (
+                    'Emulated job failure' if status == 'failed' else f'Job is {status}'
+                ),
+                'progress': progress,
+                'createdAt': job['created_at'].isoformat(),
+                'updatedAt': datetime.now(timezone.utc).isoformat(),
+                'dataExpiration': (job['created_at'] + timedelta(days=30)).isoformat(),
+                'links': links,
+                'request': job['request'],
+                'numInputGranules': len(job['files']),
+                'jobID': job_id,
+            }
+        )
+
+    def result_url(self, job_id: str, file_index: int, fixture: Path) -> str:
+        """Result URLs follow the staged Harmony output layout, so harmony-py
+        prefixes downloaded file names with the item index.
+
+        """
+        return (
+            f'{self.root_url}/service-results/harmony-emulator/'
+            f'{job_id}/{file_index}/{fixture.name}'
+        )
+
+    def send_stac_catalog(self, job_id: str):
+        job = self.get_job(job_id)
+        if job is None:
+            return
+
+        catalog_url = f'{self.root_url}/stac/{job_id}/'
+        self.send_json(
+            {
+                'stac_version': '1.0.0',
+                'type': 'Catalog',
+                'id': job_id,
+                'description': 'Harmony emulator output',
+                'links': [
+                    {'rel': 'root', 'href': catalog_url, 'type': 'application/json'},
+                    {'rel': 'self', 'href': catalog_url, 'type': 'application/json'},
+                ]
+                + [
+                    {
+                        'rel': 'item',
+                        'href': f'{catalog_url}{file_index}/',
+                        'type': 'application/json',
+                    }
+                    for file_index in range(len(job['files']))
+                ],
+            }
+        )
+
+    def send_stac_item(self, job_id: str, file_index: int):
+        job = self.get_job(job_id)
+        if job is None:
+            return
+
+        if file_index >= len(job['files']):
+            self.send_json({'description': 'Item not found'}, status=404)
+            return
+
+        catalog_url = f'{self.root_url}/stac/{job_id}/'
+        item_url = f'{catalog_url}{file_index}/'
+        fixture = job['files'][file_index]
+        self.send_json(
+            {
+                'stac_version': '1.0.0',
+                'type': 'Feature',
+                'id': f'{job_id}_{file_index}',
+                'geometry': {
+                    'type': 'Polygon',
+                    'coordinates': [
+                        [[-180, -90], [180, -90], [180, 90], [-180, 90], [-180, -90]]
+                    ],
+                },
+                'bbox': [-180, -90, 180, 90],
+                'properties': {'datetime': job['created_at'].isoformat()},
+                'assets': {
+                    'data': {
+                        'href': self.result_url(job_id, file_index, fixture),
+                        'title': fixture.name,
+                        'roles': ['data'],
+                    }
+                },
+                'links': [
+                    {'rel': 'root', 'href': catalog_url, 'type': 'application/json'},
+                    {'rel': 'parent', 'href': catalog_url, 'type': 'application/json'},
+                    {'rel': 'self', 'href': item_url, 'type': 'application/json'},
+                ],
+            }
+        )
+
+    def send_result_file(self, job_id: str, file_index: int):
+        """Serve a result file, honouring Range and If-Range headers."""
+        job = self.get_job(job_id)
+        if job is None:
+            return
+
+        fixture = job['files'][file_index % len(job['files'])]
+        etag = self.state.get_etag(fixture)
+        size = fixture.stat().st_size
+        start = 0
+        range_match = re.match(r'bytes=(\d+)-$', self.headers.get('Range', ''))
+
+        if range_match and self.headers.get('If-Range', etag) == etag:
+            start = int(range_match.group(1))
+
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{size - 1}/{size}')
+        else:
+            self.send_response(200)
+
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(size - start))
+        self.send_header('ETag', etag)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+
+        drop_at = (
+            start + (size - start) // 2 if self.state.should_drop_download() else None
+        )
+
+        with open(fixture, 'rb') as file_handler:
+            file_handler.seek(start)
+            position = start
+
+            while chunk := file_handler.read(STREAM_CHUNK_BYTES):
+                if drop_at is not None and position + len(chunk) > drop_at:
+                    self.wfile.write(chunk[: drop_at - position])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+
+                self.wfile.write(chunk)
+                position += len(chunk)
+
+                if self.state.bandwidth:
+                    sleep(len(chunk) / self.state.bandwidth)
+
+    def send_json(self, body: dict, status: int = 200):
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def start_emulator(
+    state: EmulatorState, host: str = 'localhost', port: int = 3000
+) -> ThreadingHTTPServer:
+    """Start the emulator in a daemon thread, returning the server, which
+    can be stopped with `server.shutdown()`.
+
+    """
+    server = ThreadingHTTPServer((host, port), HarmonyRequestHandler)
+    server.daemon_threads = True
+    server.state = state
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_emulator_arguments(parser: ArgumentParser):
+    """Command line options shared by the emulator and the benchmark."""
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument(
+        '--fixtures',
+        nargs='+',
+        type=Path,
+        help='Files served as job results (default: all suite reference files)',
+    )
+    parser.add_argument('--files-per-job', type=int, default=1)
+    parser.add_argument(
+        '--queue-time', type=float, default=0.5, help='Seconds each job is queued'
+    )
+    parser.add_argument(
+        '--job-duration', type=float, default=2.0, help='Seconds each job runs'
+    )
+    parser.add_argument(
+        '--latency', type=float, default=0.0, help='Seconds added to every response'
+    )
+    parser.add_argument(
+        '--failure-rate', type=float, default=0.0, help='Fraction of jobs that fail'
+    )
+    parser.add_argument(
+        '--error-rate',
+        type=float,
+        default=0.0,
+        help='Fraction of GET requests that return HTTP 503',
+    )
+    parser.add_argument(
+        '--drop-rate',
+        type=float,
+        default=0.0,
+        help='Fraction of result downloads cut off half way through',
+    )
+    parser.add_argument(
+        '--bandwidth', type=float, default=None, help='Download bytes per second'
+    )
+    parser.add_argument('--seed', type=int, default=None)
+
+
+def state_from_arguments(arguments) -> EmulatorState:
+    return EmulatorState(
+        fixtures=arguments.fixtures or default_fixtures(),
+        files_per_job=arguments.files_per_job,
+        queue_time=arguments.queue_time,
+        job_duration=arguments.job_duration,
+        latency=arguments.latency,
+        failure_rate=arguments.failure_rate,
+        error_rate=arguments.error_rate,
+        drop_rate=arguments.drop_rate,
+        bandwidth=arguments.bandwidth,
+        seed=arguments.seed,
+    )
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    add_emulator_arguments(parser)
+    arguments = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        (arguments.host, arguments.port), HarmonyRequestHandler
+    )
+    server.daemon_threads = True
+    server.state = state_from_arguments(arguments)
+    print(f'Harmony emulator listening on http://{arguments.host}:{arguments.port}')
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
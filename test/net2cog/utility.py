@@ -1,6 +1,6 @@
 """Simple utility functions used in the net2cog test notebook."""
 
-import hashlib
+from functools import cached_property
 import json
 from os.path import basename
 from pathlib import Path
@@ -8,11 +8,16 @@ from tempfile import TemporaryDirectory
 from typing import Any
 
 from harmony import Client
-from numpy.testing import assert_array_almost_equal
-from rio_cogeo.cogeo import cog_validate, cog_info
+from rasterio.coords import BoundingBox
+from rio_cogeo.cogeo import cog_info
+from rio_cogeo.models import Info
+import numpy as np
 import rasterio
 import matplotlib.pyplot as plt
 
+from file_hashing import hash_downloaded_files
+from raster_comparison import assert_rasters_equal
+
 
 def print_error(error_string: str) -> None:
     """Print an error, with formatting for red text."""
@@ -26,20 +31,76 @@ def print_success(success_string: str) -> None:
     return
 
 
-def verify_cog_crs(downloaded_cog_file, expected_crs: str):
+class CogInspection:
+    """The properties of a single COG used by the checks in this module.
+
+    Each property is computed at most once per file. A single `cog_info` call
+    both validates the COG and reads its metadata, and the first band is only
+    read if it is needed for plotting or band statistics.
+
+    """
+
+    def __init__(self, cog_file: str | Path):
+        self.cog_file = cog_file
+
+    @cached_property
+    def info(self) -> Info:
+        """COG validation results and metadata from `rio_cogeo`."""
+        return cog_info(self.cog_file)
+
+    @property
+    def is_valid(self) -> bool:
+        return self.info.COG
+
+    @property
+    def crs(self) -> str | None:
+        return self.info.GEO.CRS
+
+    @property
+    def bounds(self) -> BoundingBox:
+        return BoundingBox(*self.info.GEO.BoundingBox)
+
+    @property
+    def overviews(self) -> list[int]:
+        """The decimation factor of each overview level."""
+        return [ifd.Decimation for ifd in self.info.IFD[1:]]
+
+    @cached_property
+    def first_band(self) -> np.ndarray:
+        with rasterio.open(self.cog_file) as dataset:
+            return dataset.read(1)
+
+    @cached_property
+    def band_statistics(self) -> dict[str, float]:
+        """Minimum, maximum and mean of the first band, excluding fill values
+        and NaNs.
+
+        """
+        data = self.first_band[np.isfinite(self.first_band)]
+
+        if self.info.Profile.Nodata is not None:
+            data = data[data != self.info.Profile.Nodata]
+
+        if data.size == 0:
+            return {}
+
+        return {
+            "min": float(data.min()),
+            "max": float(data.max()),
+            "mean": float(data.mean(dtype=np.float64)),
+        }
+
+
+def verify_cog_crs(cog: CogInspection, expected_crs: str):
     """Verify output file is valid COG and CRS is correct"""
-    print(f"Assessing: {basename(downloaded_cog_file)}")
+    print(f"Assessing: {basename(cog.cog_file)}")
 
-    assert cog_validate(downloaded_cog_file)[0]
+    assert cog.is_valid
     print_success("Generated output files is a valid COG.")
 
-    assert (
-        cog_info(downloaded_cog_file).GEO.CRS == expected_crs
-    ), f"Expected crs {expected_crs}, got {cog_info(downloaded_cog_file).GEO.CRS}"
+    assert cog.crs == expected_crs, f"Expected crs {expected_crs}, got {cog.crs}"
 
-    print_success(
-        f"Correct Coordinate Reference System (CRS): {cog_info(downloaded_cog_file).GEO.CRS}"
-    )
+    print_success(f"Correct Coordinate Reference System (CRS): {cog.crs}")
 
 
 def validate_smap_outputs(
@@ -71,7 +132,8 @@ def validate_smap_outputs(
         )
 
         for downloaded_cog_file in downloaded_cog_outputs:
-            verify_cog_crs(downloaded_cog_file, expected_results["expected_crs"])
+            cog = CogInspection(downloaded_cog_file)
+            verify_cog_crs(cog, expected_results["expected_crs"])
 
             reference_file = Path(
                 "./reference_data",
@@ -83,9 +145,7 @@ def validate_smap_outputs(
                     downloaded_cog_file, reference_file
                 )
 
-            validate_bounding_box_and_plot_cog_file(
-                downloaded_cog_file, expected_results
-            )
+            validate_bounding_box_and_plot_cog_file(cog, expected_results)
 
 
 def validate_nisar_outputs(
@@ -94,6 +154,7 @@ def validate_nisar_outputs(
     expected_results: dict[str, Any],
     test_case,
     save_md5sums: bool = False,
+    hash_algorithm: str = "md5",
 ):
     """Helper function to retrieve outputs from Harmony GCOV net2cog request and compare to reference
     metadata and files.
@@ -105,16 +166,24 @@ def validate_nisar_outputs(
     * The expected CRS value and output file CRS match.
     * The data's md5sum matches reference md5sum.
 
+    Each file is hashed in a separate thread as soon as its download
+    completes. A `hash_algorithm` other than "md5" (e.g., the faster "crc32")
+    uses reference values saved to `md5sums/<test_case>.<hash_algorithm>.json`.
+
     """
 
     harmony_client.wait_for_processing(harmony_job_id)
 
     with TemporaryDirectory() as temp_dir:
-        downloaded_cog_outputs = [
-            Path(harmony_client.download(url, temp_dir).result())
+        download_futures = [
+            harmony_client.download(url, temp_dir)
             for url in harmony_client.result_urls(harmony_job_id)
             if not url.endswith(".txt")
         ]
+        file_hashes = hash_downloaded_files(download_futures, algorithm=hash_algorithm)
+        downloaded_cog_outputs = [
+            Path(download_future.result()) for download_future in download_futures
+        ]
 
         assert len(downloaded_cog_outputs) == expected_results["expected_file_count"]
         print_success(
@@ -122,25 +191,26 @@ def validate_nisar_outputs(
         )
 
         for file in downloaded_cog_outputs:
-            verify_cog_crs(file, expected_results["expected_crs"])
-            with rasterio.open(file) as src:
-                src.read(1)  # Read the first band
-
-                assert (
-                    src.bounds in expected_results["expected_bounding_box"]
-                ), f"Bounds didn't match: Expected {expected_results['expected_bounding_box']}, got {src.bounds}"
-                print_success(f"Correct Bounding Box: {src.bounds}")
-
-        # Use md5sums to compare previously returned outputs
-        actual_md5sums = {
-            # file extension: md5sum
-            f"science{file.name.split('science')[1]}": hashlib.md5(
-                file.read_bytes()
-            ).hexdigest()
-            for file in downloaded_cog_outputs
-        }
+            cog = CogInspection(file)
+            verify_cog_crs(cog, expected_results["expected_crs"])
+
+            assert (
+                cog.bounds in expected_results["expected_bounding_box"]
+            ), f"Bounds didn't match: Expected {expected_results['expected_bounding_box']}, got {cog.bounds}"
+            print_success(f"Correct Bounding Box: {cog.bounds}")
+
+    # Use md5sums to compare previously returned outputs
+    actual_md5sums = {
+        # file extension: md5sum
+        f"science{file.name.split('science')[1]}": file_hashes[file]
+        for file in downloaded_cog_outputs
+    }
+
+    if hash_algorithm == "md5":
+        md5sums_path = Path("md5sums") / f"{test_case}.json"
+    else:
+        md5sums_path = Path("md5sums") / f"{test_case}.{hash_algorithm}.json"
 
-    md5sums_path = Path("md5sums") / f"{test_case}.json"
     if save_md5sums:
         print(f"Saving md5sums to {md5sums_path}")
         md5sums_path.write_text(json.dumps(actual_md5sums, indent=4) + "\n")
@@ -155,7 +225,11 @@ def validate_nisar_outputs(
 def assert_dataset_produced_correct_results(
     generated_file: Path, reference_file: Path
 ) -> None:
-    """Check that the generated data matches the expected data."""
+    """Check that the generated data matches the expected data. The data
+    are compared one block at a time, to the same precision as
+    `numpy.testing.assert_array_almost_equal`.
+
+    """
     with rasterio.open(generated_file) as test_dataset:
         with rasterio.open(reference_file) as reference_dataset:
             assert (
@@ -163,47 +237,44 @@ def assert_dataset_produced_correct_results(
             ), f"output has incorrect metadata: {test_dataset.meta}"
             print_success("Generated image has correct metadata.")
 
-            ref_image = reference_dataset.read()
-            test_image = test_dataset.read()
-            assert_array_almost_equal(ref_image, test_image)
+    assert_rasters_equal(generated_file, reference_file, rtol=0, atol=1.5e-06)
 
     print_success("Generated image contains correct data.")
 
 
 def validate_bounding_box_and_plot_cog_file(
-    cog_file: str, expected_results: dict[str, Any]
+    cog: CogInspection, expected_results: dict[str, Any]
 ) -> None:
-    """Helper function to open, validate the bounding box, and plot the COG file.
+    """Helper function to validate the bounding box, and plot the COG file.
 
     Checks:
 
     * The bounding box value in the output file is identical to the expected bounding box
 
     """
-    with rasterio.open(cog_file) as src:
-        raster_data = src.read(1)  # Read the first band
+    bounds = cog.bounds
+    expected_bboxs = expected_results["expected_bounding_box"]
+    assert (
+        bounds in expected_bboxs
+    ), f"Bounds did not match: Expected {expected_bboxs}, got {bounds}"
+    print_success(f"Correct Bounding Box: {bounds}")
+
+    extent = (
+        float(bounds.left),
+        float(bounds.right),
+        float(bounds.bottom),
+        float(bounds.top),
+    )
 
-        expected_bboxs = expected_results["expected_bounding_box"]
-        assert (
-            src.bounds in expected_bboxs
-        ), f"Bounds did not match: Expected {expected_bboxs}, got {src.bounds}"
-        print_success(f"Correct Bounding Box: {src.bounds}")
-
-        extent = (
-            float(src.bounds.left),
-            float(src.bounds.right),
-            float(src.bounds.bottom),
-            float(src.bounds.top),
-        )
+    # If bounds.bottom > bounds.top, the graph will be inverted.
+    # When origin='lower' is used, the vertical axis points upward,
+    # ensuring a correctly oriented graph
+    if bounds.bottom > bounds.top:
+        plt.imshow(cog.first_band, extent=extent, origin="lower")
+    else:
+        plt.imshow(cog.first_band, extent=extent)
 
-        # If src.bounds.bottom > src.bounds.top, the graph will be inverted.
-        # When origin='lower' is used, the vertical axis points upward,
-        # ensuring a correctly oriented graph
-        if src.bounds.bottom > src.bounds.top:
-            plt.imshow(raster_data, extent=extent, origin="lower")
-        else:
-            plt.imshow(raster_data, extent=extent)
-
-        plt.title(f"{basename(cog_file)}")
-        plt.show()
-        print(f"{basename(cog_file)}: {src.bounds}\n")
+    plt.title(f"{basename(cog.cog_file)}")
+    plt.show()
+    print(f"{basename(cog.cog_file)}: {bounds}")
+    print(f"First band statistics: {cog.band_statistics}\n")
@@ -9,4 +9,16 @@ mkdir -p /workdir/output/${env_sub_dir}
 
 export NETRC=/workdir/.netrc
 
+# Harmony job and comparison timings recorded by shared_utils/timing.py.
+export REGRESSION_TIMINGS_FILE=/workdir/output/${env_sub_dir}/timings.jsonl
+rm -f ${REGRESSION_TIMINGS_FILE}
+
 papermill --cwd ${env_sub_dir} ${env_sub_dir}/${env_notebook} /workdir/output/${env_sub_dir}/Results.ipynb -p harmony_host_url $harmony_host_url -k python3
+papermill_exit_code=$?
+
+# Extract per-cell durations, including for failed runs, without changing the
+# exit code of the test suite.
+python /workdir/notebook_timings.py cells /workdir/output/${env_sub_dir}/Results.ipynb \
+    || echo "Unable to extract cell timings from Results.ipynb"
+
+exit ${papermill_exit_code}
@@ -0,0 +1,200 @@
+"""Extract and summarise timing information from regression test runs.
+
+This script only uses the Python standard library, so that it can run both
+in the test suite containers and on the host running `run_notebooks.sh`.
+
+* `cells` reads the per-cell durations that papermill records in the output
+  notebook metadata, and writes them to `cell_timings.csv` and
+  `cell_timings.json` alongside the notebook.
+* `summary` aggregates the cell timings and any Harmony job or comparison
+  timings (`timings.jsonl`, written by `shared_utils/timing.py`) for every
+  suite in an output directory into `timing-summary.csv`.
+
+Usage:
+
+    python notebook_timings.py cells output/<suite>/Results.ipynb
+    python notebook_timings.py summary output
+
+"""
+
+from pathlib import Path
+import csv
+import json
+import sys
+
+CELL_TIMING_FIELDS = [
+    'cell_index',
+    'execution_count',
+    'status',
+    'start_time',
+    'end_time',
+    'duration',
+    'first_line',
+]
+
+SUMMARY_FIELDS = [
+    'suite',
+    'cells',
+    'cell_seconds',
+    'slowest_cell_index',
+    'slowest_cell_seconds',
+    'harmony_jobs',
+    'harmony_submit_seconds',
+    'harmony_processing_seconds',
+    'harmony_job_seconds',
+    'harmony_download_seconds',
+    'comparisons',
+    'comparison_seconds',
+]
+
+
+def get_cell_timings(notebook_path: Path) -> list[dict]:
+    """Read the timing metadata papermill records for each code cell."""
+    with open(notebook_path, encoding='utf-8') as file_handler:
+        notebook = json.load(file_handler)
+
+    cell_timings = []
+
+    for cell_index, cell in enumerate(notebook.get('cells', [])):
+        papermill_metadata = cell.get('metadata', {}).get('papermill', {})
+
+        if cell.get('cell_type') != 'code' or 'duration' not in papermill_metadata:
+            continue
+
+        source = cell.get('source', '')
+        if isinstance(source, list):
+            source = ''.join(source)
+
+        cell_timings.append(
+            {
+                'cell_index': cell_index,
+                'execution_count': cell.get('execution_count'),
+                'status': papermill_metadata.get('status'),
+                'start_time': papermill_metadata.get('start_time'),
+                'end_time': papermill_metadata.get('end_time'),
+                'duration': papermill_metadata.get('duration'),
+                'first_line': source.strip().split('\n', 1)[0][:100],
+            }
+        )
+
+    return cell_timings
+
+
+def write_cell_timings(notebook_path: Path):
+    """Write the cell timings for a notebook as CSV and JSON files in the
+    same directory as the notebook.
+
+    """
+    cell_timings = get_cell_timings(notebook_path)
+    output_dir = notebook_path.parent
+
+    with open(output_dir / 'cell_timings.json', 'w', encoding='utf-8') as json_file:
+        json.dump(cell_timings, json_file, indent=2)
+
+    with open(output_dir / 'cell_timings.csv', 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=CELL_TIMING_FIELDS)
+        writer.writeheader()
+        writer.writerows(cell_timings)
+
+    print(f'Wrote timings for {len(cell_timings)} cells to {output_dir}')
+
+
+def read_timing_events(timings_path: Path) -> list[dict]:
+    """Read the JSON Lines timing events written by `shared_utils/timing.py`."""
+    if not timings_path.is_file():
+        return []
+
+    with open(timings_path, encoding='utf-8') as file_handler:
+        return [json.loads(line) for line in file_handler if line.strip()]
+
+
+def summarise_suite(suite_dir: Path) -> dict:
+    """Aggregate the cell and Harmony timings for a single suite."""
+    cell_timings_path = suite_dir / 'cell_timings.json'
+    cell_timings = []
+
+    if cell_timings_path.is_file():
+        with open(cell_timings_path, encoding='utf-8') as file_handler:
+            cell_timings = json.load(file_handler)
+
+    events = read_timing_events(suite_dir / 'timings.jsonl')
+    slowest_cell = max(
+        cell_timings, key=lambda cell: cell['duration'] or 0, default=None
+    )
+
+    def total_seconds(category, field='seconds'):
+        return round(
+            sum(
+                event.get(field) or 0
+                for event in events
+                if event['category'] == category
+            ),
+            3,
+        )
+
+    return {
+        'suite': suite_dir.name,
+        'cells': len(cell_timings),
+        'cell_seconds': round(sum(cell['duration'] or 0 for cell in cell_timings), 3),
+        'slowest_cell_index': slowest_cell and slowest_cell['cell_index'],
+        'slowest_cell_seconds': slowest_cell and slowest_cell['duration'],
+        'harmony_jobs': sum(event['category'] == 'harmony_job' for event in events),
+        'harmony_submit_seconds': total_seconds('harmony_submit'),
+        'harmony_processing_seconds': total_seconds(
+            'harmony_job', 'processing_seconds'
+        ),
+        'harmony_job_seconds': total_seconds('harmony_job'),
+        'harmony_download_seconds': total_seconds('harmony_download'),
+        'comparisons': sum(event['category'] == 'comparison' for event in events),
+        'comparison_seconds': total_seconds('comparison'),
+    }
+
+
+def write_summary(output_dir: Path):
+    """Summarise the timings of every suite in the output directory, writing
+    `timing-summary.csv` and printing the summary, slowest suite first.
+
+    """
+    suite_summaries = sorted(
+        (
+            summarise_suite(suite_dir)
+            for suite_dir in output_dir.iterdir()
+            if suite_dir.is_dir()
+            and (
+                (suite_dir / 'cell_timings.json').is_file()
+                or (suite_dir / 'timings.jsonl').is_file()
+            )
+        ),
+        key=lambda summary: summary['cell_seconds'],
+        reverse=True,
+    )
+
+    with open(output_dir / 'timing-summary.csv', 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(suite_summaries)
+
+    print('\nTiming summary (seconds):')
+    print(
+        f'{"suite":<32}{"notebook":>10}{"jobs":>10}{"processing":>12}'
+        f'{"download":>10}{"compare":>10}'
+    )
+    for summary in suite_summaries:
+        print(
+            f'{summary["suite"]:<32}{summary["cell_seconds"]:>10}'
+            f'{summary["harmony_job_seconds"]:>10}'
+            f'{summary["harmony_processing_seconds"]:>12}'
+            f'{summary["harmony_download_seconds"]:>10}'
+            f'{summary["comparison_seconds"]:>10}'
+        )
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] not in ['cells', 'summary']:
+        print(__doc__)
+        sys.exit(1)
+
+    if sys.argv[1] == 'cells':
+        write_cell_timings(Path(sys.argv[2]))
+    else:
+        write_summary(Path(sys.argv[2]))
@@ -14,15 +14,38 @@ Usage:
   ./test/run_notebooks.sh [options] [suite ...]
 
 Options:
-  --use-versions  Use per-suite version.txt tags (or suite IMAGE env var override)
-  --dynamic       Compute expected regression image tag from services_tested.txt
-                  and deployed Harmony service versions; use matching tagged
-                  image when available, otherwise fall back to the suite's
-                  version from test/<suite>/version.txt
-  -h, --help      Show this help text
+  --use-versions    Use per-suite version.txt tags (or suite IMAGE env var override)
+  --dynamic         Compute expected regression image tag from services_tested.txt
+                    and deployed Harmony service versions; use matching tagged
+                    image when available, otherwise fall back to the suite's
+                    version from test/<suite>/version.txt
+  --max-parallel N  Run at most N test suite containers at the same time
+                    (default: MAX_PARALLEL_SUITES, or 4)
+  -h, --help        Show this help text
 
 Environment:
-  HARMONY_HOST_URL  Required. Set to the Harmony environment URL to run tests.
+  HARMONY_HOST_URL      Required. Set to the Harmony environment URL to run tests.
+  MAX_PARALLEL_SUITES   Optional. Default for --max-parallel.
+  SUITE_DURATIONS_FILE  Optional. Tab-separated file of suite durations from
+                        previous runs, used to start the longest suites first.
+                        Defaults to ./output/suite-durations.tsv.
+  TIMINGS_DB            Optional. SQLite database of historical suite and
+                        request timings, used to detect slowdowns.
+                        Defaults to ./output/timings.sqlite.
+  HARMONY_REGRESSION_HTTP_CACHE
+                        Optional. Path of an SQLite file, shared by all test
+                        suite containers, that persists cached HTTP responses
+                        between runs (used by the harmony-regression suite).
+  REGRESSION_JOB_TIMINGS
+                        Optional. If set, each Harmony job is polled until it
+                        finishes before its results are downloaded, so that
+                        job processing and download times are recorded
+                        separately. This adds requests to every job.
+  HARMONY_REGRESSION_CACHE_DIR
+                        Optional. Directory, shared by all test suite
+                        containers, that persists the shared_utils download
+                        cache between runs. Its size limit can be set with
+                        HARMONY_REGRESSION_CACHE_MAX_BYTES.
 
 Arguments:
   suite           Optional suite names (e.g. sambah hga). If omitted, run all
@@ -30,6 +53,7 @@ Arguments:
 
 Examples:
   ./test/run_notebooks.sh --dynamic sambah
+  ./test/run_notebooks.sh --max-parallel 2 hga hoss sambah
 EOF
 }
 
@@ -86,6 +110,10 @@ while [[ $# -gt 0 ]]; do
             dynamic=true
             shift
             ;;
+        --max-parallel)
+            max_parallel="$2"
+            shift 2
+            ;;
         *)
             specified_images+=("$1")
             shift
@@ -104,69 +132,245 @@ if [[ "${dynamic:-false}" == true ]]; then
     echo "Failed to fetch /service-image-tag from ${HARMONY_HOST_URL}" >&2
     exit 1
   fi
+  # Compute the image and service tag of every suite up front.
+  if ! resolve_suite_images "$HARMONY_HOST_URL" "${images[@]}"; then
+    echo "Failed to determine images for ${images[*]}" >&2
+    exit 1
+  fi
+fi
+
+max_parallel="${max_parallel:-${MAX_PARALLEL_SUITES:-4}}"
+if ! [[ "${max_parallel}" =~ ^[1-9][0-9]*$ ]]; then
+  echo "--max-parallel must be a positive integer, got '${max_parallel}'" >&2
+  exit 1
 fi
 
+mkdir -p "${PWD}/output"
+durations_file="${SUITE_DURATIONS_FILE:-${PWD}/output/suite-durations.tsv}"
+timings_db="${TIMINGS_DB:-${PWD}/output/timings.sqlite}"
+
+# The image, service tag, duration and exit code of every suite in this run,
+# ingested into the timings database once all suites have finished.
+suite_runs_file="${PWD}/output/suite-runs.tsv"
+printf 'suite\timage\tservice_tag\tduration_seconds\texit_code\n' > "${suite_runs_file}"
+
+## Print the duration in seconds of the previous run of a suite, or nothing
+## if the suite has no recorded duration.
+function previous_duration () {
+  if [[ -f "${durations_file}" ]]; then
+    awk -F'\t' -v suite="$1" '$1 == suite { print $2 }' "${durations_file}"
+  fi
+}
+
+## Replace the recorded duration of a suite with the latest value.
+function record_duration () {
+  local suite="$1"
+  local seconds="$2"
+  local updated_file="${durations_file}.tmp"
+
+  if [[ -f "${durations_file}" ]]; then
+    awk -F'\t' -v suite="${suite}" '$1 != suite' "${durations_file}" > "${updated_file}"
+  else
+    : > "${updated_file}"
+  fi
+  printf '%s\t%s\n' "${suite}" "${seconds}" >> "${updated_file}"
+  mv "${updated_file}" "${durations_file}"
+}
+
+function timestamp () {
+  date '+%H:%M:%S'
+}
+
+# Order the suites so that the longest suites, based on previous durations,
+# start first. Suites without a recorded duration are started before all
+# others, as they may be the longest.
+pending=()
+while IFS=$'\t' read -r _ image; do
+  pending+=("${image}")
+done < <(
+  for image in "${images[@]}"; do
+    printf '%s\t%s\n' "$(previous_duration "${image}" || true)" "${image}"
+  done | awk -F'\t' '{ printf "%s\t%s\n", ($1 == "" ? 999999999 : $1), $2 }' \
+       | sort -t$'\t' -k1,1nr
+)
+
 exit_code=0
-PIDS=()
-# launch all the docker containers and store their process IDs
-for image in "${images[@]}"; do
-    echo -e "Test suite ${image} starting"
-
-    if [[ "${dynamic:-false}" == true ]]; then
-      if ! full_image=$(dynamic_image_name "$image" "$HARMONY_HOST_URL"); then
-        echo "Failed to determine image for ${image}" >&2
-        exit 1
-      fi
-    else
-      full_image=$(image_name "$image" "$use_versions")
+# Parallel arrays describing the running containers.
+running_names=()
+running_ids=()
+running_starts=()
+running_images=()
+running_tags=()
+finished_names=()
+
+## Start the container for a single test suite, recording it as running.
+function start_suite () {
+  local image="$1"
+  local full_image
+  local service_tag=""
+  local container_out
+
+  echo -e "[$(timestamp)] Test suite ${image} starting"
+
+  if [[ "${dynamic:-false}" == true ]]; then
+    full_image=$(suite_image "$image")
+    # The deployed service versions, used to group historical timings.
+    service_tag=$(suite_service_tag "$image")
+  else
+    full_image=$(image_name "$image" "$use_versions")
+  fi
+  echo "running test with $full_image"
+
+  # Mount the directories of a persistent HTTP cache and download cache, if
+  # they were requested, so they are reused by later runs.
+  local extra_args=()
+  if [[ -n "${HARMONY_REGRESSION_HTTP_CACHE:-}" ]]; then
+    local cache_dir
+    cache_dir=$(dirname "${HARMONY_REGRESSION_HTTP_CACHE}")
+    mkdir -p "${cache_dir}"
+    extra_args+=(-v "$(cd "${cache_dir}" && pwd):/workdir/http-cache"
+                 --env HARMONY_REGRESSION_HTTP_CACHE="/workdir/http-cache/$(basename "${HARMONY_REGRESSION_HTTP_CACHE}")")
+  fi
+  if [[ -n "${HARMONY_REGRESSION_CACHE_DIR:-}" ]]; then
+    mkdir -p "${HARMONY_REGRESSION_CACHE_DIR}"
+    extra_args+=(-v "$(cd "${HARMONY_REGRESSION_CACHE_DIR}" && pwd):/workdir/download-cache"
+                 --env HARMONY_REGRESSION_CACHE_DIR=/workdir/download-cache)
+    if [[ -n "${HARMONY_REGRESSION_CACHE_MAX_BYTES:-}" ]]; then
+      extra_args+=(--env HARMONY_REGRESSION_CACHE_MAX_BYTES="${HARMONY_REGRESSION_CACHE_MAX_BYTES}")
     fi
-    echo "running test with $full_image"
-    # Start the container and capture either the container id or the error message.
-    container_out=$(docker run -d -v "${PWD}/output:/workdir/output" \
-          --env EDL_PASSWORD="${EDL_PASSWORD}" --env EDL_USER="${EDL_USER}" \
-          --env harmony_host_url="${HARMONY_HOST_URL}" \
-          "${full_image}" 2>&1) || {
-      echo -e "${RED}Failed to start test suite ${image}: ${container_out}${NC}" 1>&2
-      exit_code=1
-      # don't add a PIDS entry for this failed start; continue with other suites
-      continue
-    }
-    # container_out should contain the container id on success
-    PIDS+=("${image},${container_out}")
-done
+  fi
+  # Record Harmony job processing times separately from download times.
+  if [[ -n "${REGRESSION_JOB_TIMINGS:-}" ]]; then
+    extra_args+=(--env REGRESSION_JOB_TIMINGS="${REGRESSION_JOB_TIMINGS}")
+  fi
+
+  # Start the container and capture either the container id or the error message.
+  container_out=$(docker run -d -v "${PWD}/output:/workdir/output" \
+        "${extra_args[@]}" \
+        --env EDL_PASSWORD="${EDL_PASSWORD}" --env EDL_USER="${EDL_USER}" \
+        --env harmony_host_url="${HARMONY_HOST_URL}" \
+        "${full_image}" 2>&1) || {
+    echo -e "${RED}Failed to start test suite ${image}: ${container_out}${NC}" 1>&2
+    exit_code=1
+    # don't record this failed start as running; continue with other suites
+    return
+  }
+  # container_out should contain the container id on success
+  running_names+=("${image}")
+  running_ids+=("${container_out}")
+  running_starts+=("${SECONDS}")
+  running_images+=("${full_image}")
+  running_tags+=("${service_tag}")
+}
+
+## Report the result of a finished test suite container and remove it.
+function finish_suite () {
+  local name="$1"
+  local pid="$2"
+  local duration="$3"
+  local full_image="$4"
+  local service_tag="$5"
+  local code
+
+  # Count a suite whose container could not be waited on as a failure, rather
+  # than treating the empty exit code as success. 125 is the exit code docker
+  # uses for its own errors.
+  code=$(docker container wait "${pid}") || code=125
+  echo -e "\n[$(timestamp)] Output from test suite ${name}:"
+  docker logs "${pid}"
+
+  if [[ "${code}" -ne 0 ]]; then
+    echo -e "${RED}Test suite ${name} failed with exit code ${code} after ${duration}s${NC}" 1>&2;
+    exit_code=1
+  else
+    echo -e "${GREEN}Test suite ${name} succeeded after ${duration}s${NC}"
+  fi
+  record_duration "${name}" "${duration}"
+  printf '%s\t%s\t%s\t%s\t%s\n' "${name}" "${full_image}" "${service_tag}" \
+         "${duration}" "${code}" >> "${suite_runs_file}"
+  finished_names+=("${name}")
+  docker rm "${pid}" >/dev/null
+}
+
+## Print a one line summary of the scheduler state.
+function print_status () {
+  echo "[$(timestamp)] running: ${running_names[*]:-none} |" \
+       "pending: ${#pending[@]} | finished: ${#finished_names[@]}"
+}
 
 trap ctrl_c SIGINT SIGTERM
 
 function ctrl_c() {
   echo "Cleaning up"
-  for name_comma_pid in "${PIDS[@]}"; do
-    name_pid=(${name_comma_pid//,/ })
-    echo "Killing ${name_pid[0]}"
-    docker kill "${name_pid[1]}" >/dev/null
-    docker rm "${name_pid[1]}" >/dev/null
+  for index in "${!running_ids[@]}"; do
+    echo "Killing ${running_names[$index]}"
+    docker kill "${running_ids[$index]}" >/dev/null
+    docker rm "${running_ids[$index]}" >/dev/null
   done
   echo "Exiting"
   exit 1
 }
-# wait for processes to finish and store each exit code into array STATUS'
-for name_comma_pid in "${PIDS[@]}"; do
-  name_pid=(${name_comma_pid//,/ })
-  name=${name_pid[0]}
-  pid=${name_pid[1]}
-
-  echo "Waiting for ${name}."
-  docker logs --follow "${pid}"
-  code=$(docker container wait ${pid})
-
-  if [[ ${code} -ne 0 ]]; then
-    echo -e "${RED}Test suite ${name} failed with exit code ${code}${NC}" 1>&2;
-    exit_code=1
-  else
-    echo -e "${GREEN}Test suite ${name} succeeded${NC}"
+
+echo "Running ${#pending[@]} test suites, at most ${max_parallel} at a time"
+
+# Start suites until the concurrency limit is reached, then poll the running
+# containers, starting the next pending suite whenever one finishes.
+while [[ ${#pending[@]} -gt 0 || ${#running_ids[@]} -gt 0 ]]; do
+  state_changed=false
+
+  while [[ ${#pending[@]} -gt 0 && ${#running_ids[@]} -lt ${max_parallel} ]]; do
+    start_suite "${pending[0]}"
+    pending=("${pending[@]:1}")
+    state_changed=true
+  done
+
+  still_running_names=()
+  still_running_ids=()
+  still_running_starts=()
+  still_running_images=()
+  still_running_tags=()
+  for index in "${!running_ids[@]}"; do
+    pid="${running_ids[$index]}"
+    if [[ "$(docker inspect -f '{{.State.Running}}' "${pid}" 2>/dev/null)" == true ]]; then
+      still_running_names+=("${running_names[$index]}")
+      still_running_ids+=("${pid}")
+      still_running_starts+=("${running_starts[$index]}")
+      still_running_images+=("${running_images[$index]}")
+      still_running_tags+=("${running_tags[$index]}")
+    else
+      finish_suite "${running_names[$index]}" "${pid}" \
+                   "$(( SECONDS - running_starts[index] ))" \
+                   "${running_images[$index]}" "${running_tags[$index]}"
+      state_changed=true
+    fi
+  done
+  running_names=("${still_running_names[@]}")
+  running_ids=("${still_running_ids[@]}")
+  running_starts=("${still_running_starts[@]}")
+  running_images=("${still_running_images[@]}")
+  running_tags=("${still_running_tags[@]}")
+
+  if [[ "${state_changed}" == true ]]; then
+    print_status
+  fi
+
+  if [[ "${state_changed}" == false ]]; then
+    sleep 5
   fi
-  docker rm ${pid} >/dev/null
 done
 
+# Aggregate the cell, Harmony job and comparison timings across suites, add
+# them to the timings history and report any slowdowns against previous runs
+# with the same deployed service versions. Slowdowns do not fail the tests.
+if command -v python3 >/dev/null 2>&1; then
+  python3 "${SCRIPT_DIR}/../test/notebook_timings.py" summary "${PWD}/output" \
+    || echo "Unable to summarise test suite timings" >&2
+  python3 "${SCRIPT_DIR}/../test/timing_history.py" record "${PWD}/output" \
+    --environment "${HARMONY_HOST_URL}" --db "${timings_db}" \
+    && python3 "${SCRIPT_DIR}/../test/timing_history.py" check "${PWD}/output" \
+    --environment "${HARMONY_HOST_URL}" --db "${timings_db}"
+fi
+
 if [[ ${exit_code} -ne 0 ]]; then
   echo "Tests completed (failed)"
 else
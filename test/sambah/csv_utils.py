@@ -1,32 +1,219 @@
-import json
-import hashlib
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import StringIO, TextIOWrapper
+from itertools import chain
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
 from zipfile import ZipFile
+import csv
+import hashlib
+import json
 
+# Canonical CSV text is passed to the hash in batches of roughly this size.
+HASH_BUFFER_CHARACTERS = 1024 * 1024
 
-def create_csv_hash_file(input_file_path: str, reference_file_path: str):
-    ref_output = []
-    with ZipFile(input_file_path, "r") as z:
-        csv_list = [fname for fname in z.namelist() if fname.endswith('.csv')]
-        for csv_file in csv_list:
-            with z.open(csv_file) as ff:
-                df = pd.read_csv(ff, dtype=str, keep_default_na=False)
-                df = df.sort_index(axis=1)
-                b = df.to_csv(index=False, lineterminator="\n").encode("utf-8")
-                ref_output.append(hashlib.sha256(b).hexdigest())
+
+def create_csv_hash_file(
+    input_file_path: str, reference_file_path: str, max_workers: int | None = None
+):
+    ref_output = get_csv_hashes(input_file_path, max_workers=max_workers)
 
     with open(reference_file_path, 'w') as fout:
         json.dump(ref_output, fout, indent=2)
     return reference_file_path
 
 
-def csv_matches_reference_hash_file(input_file_path: str, reference_file_path: str):
-    json_file_path = create_csv_hash_file(
-        input_file_path, input_file_path.with_suffix('.json')
+def get_csv_hashes(input_file_path: str, max_workers: int | None = None) -> list[str]:
+    """Return the canonical SHA-256 hash of each CSV file in a zip archive,
+    in archive order. If `max_workers` is greater than one, CSV files are
+    hashed in parallel, with each worker process opening the archive itself.
+
+    """
+    return list(get_csv_member_hashes(input_file_path, max_workers).values())
+
+
+def get_csv_member_hashes(
+    input_file_path: str, max_workers: int | None = None
+) -> dict[str, str]:
+    """Return a mapping of the name of each CSV file in a zip archive to its
+    canonical SHA-256 hash, in archive order.
+
+    """
+    with ZipFile(input_file_path, 'r') as z:
+        csv_list = [fname for fname in z.namelist() if fname.endswith('.csv')]
+
+        if max_workers is None or max_workers <= 1 or len(csv_list) <= 1:
+            return {csv_file: _hash_zipped_csv(z, csv_file) for csv_file in csv_list}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return dict(
+            zip(
+                csv_list,
+                executor.map(
+                    _hash_csv_in_worker, [input_file_path] * len(csv_list), csv_list
+                ),
+            )
+        )
+
+
+def hash_canonical_csv(csv_file: BinaryIO) -> str:
+    """SHA-256 hash of a CSV file with its columns sorted by name.
+
+    Rows are hashed as they are read, so memory use does not depend on the
+    size of the file. The canonical text matches that produced by reading
+    the file with `pandas.read_csv(dtype=str, keep_default_na=False)`, sorting
+    the columns and writing it with `to_csv(index=False, lineterminator='\\n')`,
+    so hashes are unchanged from those previously recorded: empty and
+    whitespace-only lines outside quoted fields are skipped, short rows are
+    padded with empty values, and unnamed or duplicated column names are
+    renamed in the same way as `pandas`.
+
+    As with `pandas`, if the first data row has one more field than the
+    header, the first field of every row is an implicit index column. That
+    column is not written by `to_csv(index=False)`, so it is not hashed.
+
+    """
+    reader = csv.reader(
+        _skip_blank_lines(TextIOWrapper(csv_file, encoding='utf-8-sig', newline=''))
     )
-    with open(json_file_path) as file1:
-        inp = json.load(file1)
-    with open(reference_file_path) as file2:
-        ref = json.load(file2)
+    header = next(reader, None)
+
+    if header is None:
+        raise ValueError('CSV file has no header row')
+
+    header = _pandas_column_names(header)
+    column_order = sorted(range(len(header)), key=header.__getitem__)
+    rows = reader
+    index_columns = 0
+    first_row = next(reader, None)
+
+    if first_row is not None:
+        rows = chain([first_row], reader)
+        if len(first_row) == len(header) + 1:
+            index_columns = 1
+
+    hasher = hashlib.sha256()
+    buffer = StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow([header[index] for index in column_order])
+
+    for line_number, row in enumerate(rows, start=2):
+        if len(row) > len(header) + index_columns:
+            raise ValueError(
+                f'Expected {len(header) + index_columns} fields in line '
+                f'{line_number}, saw {len(row)}'
+            )
+
+        row = row[index_columns:]
+        row.extend([''] * (len(header) - len(row)))
+        writer.writerow([row[index] for index in column_order])
+
+        if buffer.tell() >= HASH_BUFFER_CHARACTERS:
+            hasher.update(buffer.getvalue().encode('utf-8'))
+            buffer.seek(0)
+            buffer.truncate()
+
+    hasher.update(buffer.getvalue().encode('utf-8'))
+
+    return hasher.hexdigest()
+
+
+def _skip_blank_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Skip empty and whitespace-only lines, as `pandas.read_csv` does,
+    unless they are within a quoted field that spans several lines.
+
+    """
+    in_quoted_field = False
+
+    for line in lines:
+        if in_quoted_field or line.strip():
+            yield line
+
+        if line.count('"') % 2 == 1:
+            in_quoted_field = not in_quoted_field
+
+
+def _pandas_column_names(header: list[str]) -> list[str]:
+    """Name columns as `pandas.read_csv` does: empty names become
+    "Unnamed: <index>", and repeated names have ".1", ".2", etc. appended.
+
+    """
+    names = [name or f'Unnamed: {index}' for index, name in enumerate(header)]
+    counts = {}
+
+    for index, original_name in enumerate(names):
+        name = original_name
+        current_count = counts.get(name, 0)
+
+        while current_count > 0:
+            counts[original_name] = current_count + 1
+            name = f'{original_name}.{current_count}'
+
+            if name in names:
+                current_count += 1
+            else:
+                current_count = counts.get(name, 0)
+
+        names[index] = name
+        counts[name] = current_count + 1
+
+    return names
+
+
+def _hash_zipped_csv(z: ZipFile, csv_file: str) -> str:
+    with z.open(csv_file) as ff:
+        return hash_canonical_csv(ff)
+
+
+def _hash_csv_in_worker(input_file_path: str, csv_file: str) -> str:
+    with ZipFile(input_file_path, 'r') as z:
+        return _hash_zipped_csv(z, csv_file)
+
+
+def load_reference_hashes(reference_file_path: str) -> frozenset[str]:
+    """Load the set of hashes in a reference JSON file. Each file is parsed
+    once per process, unless it is modified.
+
+    """
+    reference_path = Path(reference_file_path).resolve()
+    return _load_reference_hashes(reference_path, reference_path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=None)
+def _load_reference_hashes(reference_path: Path, modified_time: int) -> frozenset[str]:
+    with open(reference_path) as file_handler:
+        return frozenset(json.load(file_handler))
+
+
+def get_csv_hash_mismatches(
+    input_file_path: str, reference_file_path: str, max_workers: int | None = None
+) -> dict[str, str]:
+    """Compare the hashes of the CSV files in a zip archive to a reference
+    JSON file, without writing the output hashes to disk. The returned
+    mapping describes each CSV file whose hash is not in the reference file,
+    and each reference hash that no CSV file matched. It is empty if the
+    output matches the reference file.
+
+    """
+    reference_hashes = load_reference_hashes(reference_file_path)
+    member_hashes = get_csv_member_hashes(input_file_path, max_workers)
+
+    mismatches = {
+        csv_file: f'hash {csv_hash} is not in the reference file'
+        for csv_file, csv_hash in member_hashes.items()
+        if csv_hash not in reference_hashes
+    }
+
+    for reference_hash in sorted(reference_hashes - set(member_hashes.values())):
+        mismatches[f'reference hash {reference_hash}'] = 'not matched by any CSV file'
+
+    return mismatches
+
+
+def csv_matches_reference_hash_file(input_file_path: str, reference_file_path: str):
+    mismatches = get_csv_hash_mismatches(input_file_path, reference_file_path)
+
+    for name, mismatch in mismatches.items():
+        print(f'{name}: {mismatch}')
 
-    return set(inp) == set(ref)
+    return len(mismatches) == 0
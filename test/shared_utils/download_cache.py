@@ -0,0 +1,172 @@
+"""A local, size-bounded cache of Harmony request outputs.
+
+Cache entries are keyed by a fingerprint of the `harmony-py` `Request`
+parameters, the Harmony environment and the deployed version of the service
+under test. Rerunning a notebook against an unchanged service can then reuse
+previously downloaded outputs instead of downloading them again. The least
+recently used entries are evicted once the cache exceeds its size limit.
+
+The cache is only used when the caller passes a `service_version` (or cache
+key) to the `utilities.py` download routines. `get_deployed_service_version`
+returns the version of a single service deployed to the Harmony environment of
+a client, as reported by Harmony.
+
+The cache location and size limit can be configured with the
+`HARMONY_REGRESSION_CACHE_DIR` and `HARMONY_REGRESSION_CACHE_MAX_BYTES`
+environment variables.
+
+"""
+
+from datetime import date, datetime
+from hashlib import sha256
+from os import environ, replace, utime
+from pathlib import Path
+from shutil import copyfile
+from tempfile import NamedTemporaryFile
+import json
+
+from harmony import Client, Request
+
+DOWNLOAD_CACHE_DIR = Path(
+    environ.get(
+        'HARMONY_REGRESSION_CACHE_DIR',
+        Path.home() / '.cache' / 'harmony-regression-tests',
+    )
+)
+
+DOWNLOAD_CACHE_MAX_BYTES = int(
+    environ.get('HARMONY_REGRESSION_CACHE_MAX_BYTES', 5 * 1024**3)
+)
+
+
+def get_deployed_service_version(
+    harmony_client: Client, service_name: str
+) -> str | None:
+    """Return the version of a service deployed to the Harmony environment of
+    the client, from the Harmony `/service-image-tag` endpoint. None is
+    returned, so that the cache is not used, if the version is unavailable.
+
+    """
+    service_image_tag_url = f'{harmony_client.config.root_url}/service-image-tag'
+
+    try:
+        service_version = json.loads(
+            harmony_client.read_text(service_image_tag_url)
+        ).get(service_name)
+    except Exception as exception:
+        print(f'Unable to get the deployed version of {service_name}: {exception}')
+        return None
+
+    if service_version is None:
+        print(f'No deployed version of {service_name} at {service_image_tag_url}')
+
+    return service_version
+
+
+def request_fingerprint(
+    request: Request, service_version: str, harmony_root_url: str
+) -> str:
+    """Return a SHA-256 hex digest identifying a Harmony request against a
+    specific deployed service version in a specific Harmony environment.
+    Request parameters are serialised to JSON with sorted keys, so equivalent
+    requests produce the same digest.
+
+    """
+    canonical_request = json.dumps(
+        {
+            'harmony_root_url': harmony_root_url,
+            'request': vars(request),
+            'service_version': service_version,
+        },
+        sort_keys=True,
+        default=_canonical_value,
+    )
+    return sha256(canonical_request.encode('utf-8')).hexdigest()
+
+
+def get_cached_output(fingerprint: str, output_file_name: str | Path) -> bool:
+    """Copy a cached output to the specified file path, if one exists for the
+    fingerprint. Returns whether there was a cache hit.
+
+    """
+    cache_entry = _cache_entry_path(fingerprint)
+
+    if not cache_entry.is_file():
+        return False
+
+    copyfile(cache_entry, output_file_name)
+    # Mark the entry as recently used, so that it is evicted last.
+    utime(cache_entry)
+    print(f'Cache hit for {fingerprint[:12]}, saved output to: {output_file_name}')
+    return True
+
+
+def add_to_cache(fingerprint: str, output_file_name: str | Path):
+    """Store a copy of a downloaded output in the cache, then evict the least
+    recently used entries until the cache is within its size limit.
+
+    The copy is written to a temporary file and renamed into place, so that
+    concurrent readers never see a partially written entry.
+
+    """
+    cache_entry = _cache_entry_path(fingerprint)
+    cache_entry.parent.mkdir(parents=True, exist_ok=True)
+
+    with NamedTemporaryFile(dir=cache_entry.parent, delete=False) as temporary_file:
+        temporary_path = Path(temporary_file.name)
+
+    try:
+        copyfile(output_file_name, temporary_path)
+        replace(temporary_path, cache_entry)
+    finally:
+        # Only left in place if the copy failed.
+        temporary_path.unlink(missing_ok=True)
+
+    evict_cache_entries(DOWNLOAD_CACHE_MAX_BYTES)
+
+
+def evict_cache_entries(max_bytes: int):
+    """Remove the least recently used cache entries until the total size of
+    the cache is no larger than `max_bytes`.
+
+    """
+    if not DOWNLOAD_CACHE_DIR.is_dir():
+        return
+
+    cache_entries = [
+        (cache_entry.stat(), cache_entry)
+        for cache_entry in DOWNLOAD_CACHE_DIR.glob('*/*')
+        if cache_entry.is_file()
+    ]
+    total_bytes = sum(entry_stat.st_size for entry_stat, _ in cache_entries)
+
+    for entry_stat, cache_entry in sorted(
+        cache_entries, key=lambda entry: entry[0].st_mtime
+    ):
+        if total_bytes <= max_bytes:
+            break
+
+        cache_entry.unlink(missing_ok=True)
+        total_bytes -= entry_stat.st_size
+
+
+def _cache_entry_path(fingerprint: str) -> Path:
+    """Cache entries are sharded by the first two characters of their
+    fingerprint, to keep individual directories small.
+
+    """
+    return DOWNLOAD_CACHE_DIR / fingerprint[:2] / fingerprint
+
+
+def _canonical_value(value):
+    """JSON serialisation fallback for the objects in a `Request`, such as
+    `Collection` instances and `datetime` values.
+
+    """
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+
+    if hasattr(value, '__dict__'):
+        return vars(value)
+
+    return str(value)
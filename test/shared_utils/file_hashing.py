@@ -0,0 +1,130 @@
+"""Streaming file hashes for comparing outputs to previously recorded values.
+
+Hashing `Path.read_bytes()` holds each file in memory, and hashing files one
+after another leaves the CPU idle while later files download. The functions
+in this module read files in fixed-size chunks (or via `mmap`), and hash many
+files across a pool of threads, starting on each file as soon as its download
+has completed. `hashlib` releases the GIL while hashing, so threads hash
+files in parallel.
+
+Two algorithms are supported:
+
+* `md5`: compatible with existing `md5sum` reference values.
+* `crc32`: a faster, non-cryptographic checksum, suitable for reference
+  values recorded with the same algorithm.
+
+"""
+
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from mmap import ACCESS_READ, mmap
+from pathlib import Path
+import hashlib
+import zlib
+
+HASH_ALGORITHMS = ('md5', 'crc32')
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def hash_file(
+    file_path: str | Path,
+    algorithm: str = 'md5',
+    use_mmap: bool = False,
+    chunk_size: int = HASH_CHUNK_BYTES,
+) -> str:
+    """Return the hexadecimal digest of a file, reading it in chunks of
+    `chunk_size` bytes, or by memory-mapping the file if `use_mmap` is True.
+
+    """
+    hasher = _new_hasher(algorithm)
+
+    with open(file_path, 'rb') as file_handler:
+        if use_mmap and Path(file_path).stat().st_size > 0:
+            with mmap(file_handler.fileno(), 0, access=ACCESS_READ) as mapped_file:
+                hasher.update(mapped_file)
+        else:
+            buffer = bytearray(chunk_size)
+            view = memoryview(buffer)
+
+            while (bytes_read := file_handler.readinto(buffer)) > 0:
+                hasher.update(view[:bytes_read])
+
+    return hasher.hexdigest()
+
+
+def hash_files(
+    file_paths: Iterable[str | Path],
+    algorithm: str = 'md5',
+    use_mmap: bool = False,
+    max_workers: int = 4,
+) -> dict[Path, str]:
+    """Hash many files in parallel, returning a mapping of file path to
+    hexadecimal digest.
+
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        hash_futures = {
+            Path(file_path): executor.submit(hash_file, file_path, algorithm, use_mmap)
+            for file_path in file_paths
+        }
+
+    return {
+        file_path: hash_future.result()
+        for file_path, hash_future in hash_futures.items()
+    }
+
+
+def hash_downloaded_files(
+    download_futures: Iterable[Future],
+    algorithm: str = 'md5',
+    use_mmap: bool = False,
+    max_workers: int = 4,
+) -> dict[Path, str]:
+    """Hash files as their downloads complete, e.g., the futures returned by
+    `harmony.Client.download`, whose results are the downloaded file paths.
+    Files that finish downloading early are hashed while the remaining
+    downloads are still in progress.
+
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        hash_futures = {
+            Path(download_future.result()): executor.submit(
+                hash_file, download_future.result(), algorithm, use_mmap
+            )
+            for download_future in as_completed(list(download_futures))
+        }
+
+    return {
+        file_path: hash_future.result()
+        for file_path, hash_future in hash_futures.items()
+    }
+
+
+def _new_hasher(algorithm: str):
+    """Create an object with the `update` and `hexdigest` methods of a
+    `hashlib` hash for the requested algorithm.
+
+    """
+    if algorithm == 'md5':
+        return hashlib.md5(usedforsecurity=False)
+
+    if algorithm == 'crc32':
+        return _Crc32()
+
+    raise ValueError(
+        f'Unsupported hash algorithm "{algorithm}", expected one of: '
+        f'{", ".join(HASH_ALGORITHMS)}'
+    )
+
+
+class _Crc32:
+    """A `hashlib`-style wrapper around `zlib.crc32`."""
+
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+
+    def hexdigest(self) -> str:
+        return f'{self.value:08x}'
@@ -0,0 +1,237 @@
+"""Compare HDF-4 files to reference files, without reopening a file for
+every dataset.
+
+Reading each SDS or VData with its own `SD(file)` call reopens both files for
+every dataset. `compare_hdf4_files` instead opens the SD interface of the
+reference and test files once, optionally checks dimension sizes without
+reading any data, then reads each requested SDS once from each file. VData
+are read through the separate HDF/VS interface, which opens each file once
+more for all VData. SDS can also be compared across a pool of worker
+processes, each of which opens the SD interface of both files once.
+
+This module requires `pyhdf` and `numpy`.
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+
+from pyhdf.HDF import HDF
+from pyhdf.SD import SD, SDC
+from pyhdf.VS import VS
+import numpy
+
+_worker_sd_files = {}
+
+
+def compare_hdf4_files(
+    reference_file: str,
+    test_file: str,
+    sds_names: list[str] | None = None,
+    vdata_names: list[str] | None = None,
+    compare_dimensions: bool = False,
+    max_workers: int | None = None,
+) -> dict[str, str]:
+    """Compare SDS arrays and VData records between two HDF-4 files.
+
+    If `sds_names` is None, every SDS in the reference file is compared. If
+    `compare_dimensions` is True, the first two dimension sizes of the last
+    SDS in each file are also compared, as the `geoloco` suite always has,
+    and any difference is reported under `'dimensions'`. The returned report
+    maps the name of each mismatching dataset to a description of the
+    difference, and is empty if all datasets match.
+
+    If `max_workers` is greater than one, SDS are compared across a pool of
+    worker processes, each of which opens the SD interface of both files once.
+
+    """
+    report = {}
+    reference_sd = SD(reference_file, SDC.READ)
+    test_sd = SD(test_file, SDC.READ)
+
+    try:
+        reference_names = set(reference_sd.datasets())
+        test_names = set(test_sd.datasets())
+
+        if sds_names is None:
+            sds_names = list(reference_sd.datasets().keys())
+
+        if compare_dimensions:
+            reference_sizes = _last_sds_dimension_sizes(reference_sd)
+            test_sizes = _last_sds_dimension_sizes(test_sd)
+
+            if reference_sizes != test_sizes:
+                report['dimensions'] = f'{test_sizes} != reference {reference_sizes}'
+
+        if max_workers is None or max_workers <= 1:
+            for sds_name in sds_names:
+                mismatch = _compare_sds(
+                    (reference_sd, reference_names), (test_sd, test_names), sds_name
+                )
+                if mismatch is not None:
+                    report[sds_name] = mismatch
+    finally:
+        test_sd.end()
+        reference_sd.end()
+
+    if max_workers is not None and max_workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_open_worker_sd_files,
+            initargs=(reference_file, test_file),
+        ) as executor:
+            for sds_name, mismatch in executor.map(_compare_sds_in_worker, sds_names):
+                if mismatch is not None:
+                    report[sds_name] = mismatch
+
+    if vdata_names:
+        report.update(_compare_vdata(reference_file, test_file, vdata_names))
+
+    return report
+
+
+def _last_sds_dimension_sizes(file_sd: SD) -> list[int | None]:
+    """The first two dimension sizes of the last SDS in an open HDF-4 file,
+    read from its metadata, or `[None, None]` if the file has no SDS.
+
+    """
+    sds_names = list(file_sd.datasets())
+
+    if not sds_names:
+        return [None, None]
+
+    dataset = file_sd.select(sds_names[-1])
+
+    try:
+        return [size for size, *_ in dataset.dimensions(full=1).values()][:2]
+    finally:
+        dataset.endaccess()
+
+
+def _compare_sds(
+    reference: tuple[SD, set[str]], test: tuple[SD, set[str]], sds_name: str
+) -> str | None:
+    """Compare a single SDS from two open HDF-4 files. Each argument is a
+    tuple of the open file and the names of the SDS it contains.
+
+    """
+    reference_sd, reference_names = reference
+    test_sd, test_names = test
+
+    if sds_name not in reference_names and sds_name not in test_names:
+        return None
+
+    if sds_name not in reference_names:
+        return 'missing from reference file'
+
+    if sds_name not in test_names:
+        return 'missing from test file'
+
+    return _compare_arrays(
+        _read_sds(reference_sd, sds_name), _read_sds(test_sd, sds_name)
+    )
+
+
+def _read_sds(file_sd: SD, sds_name: str) -> numpy.ndarray:
+    """Read the full array of an SDS from an open HDF-4 file."""
+    dataset = file_sd.select(sds_name)
+
+    try:
+        return dataset.get()
+    finally:
+        dataset.endaccess()
+
+
+def _compare_vdata(
+    reference_file: str, test_file: str, vdata_names: list[str]
+) -> dict[str, str]:
+    """Compare VData records between two HDF-4 files, opening the HDF/VS
+    interface of each file once, separately from its SD interface.
+
+    """
+    report = {}
+    reference_hdf = HDF(reference_file)
+    test_hdf = HDF(test_file)
+    reference_vs = reference_hdf.vstart()
+    test_vs = test_hdf.vstart()
+
+    try:
+        for vdata_name in vdata_names:
+            mismatch = _compare_arrays(
+                _read_vdata(reference_vs, vdata_name),
+                _read_vdata(test_vs, vdata_name),
+            )
+            if mismatch is not None:
+                report[vdata_name] = mismatch
+    finally:
+        test_vs.end()
+        reference_vs.end()
+        test_hdf.close()
+        reference_hdf.close()
+
+    return report
+
+
+def _read_vdata(file_vs: VS, vdata_name: str) -> list | None:
+    """Read all records of a VData, or None if it is not in the file."""
+    if file_vs.find(vdata_name) == 0:
+        return None
+
+    vd = file_vs.attach(vdata_name)
+
+    try:
+        return vd[:]
+    finally:
+        vd.detach()
+
+
+def _compare_arrays(reference_data, test_data) -> str | None:
+    """Describe the difference between two arrays, or return None if they
+    are equal.
+
+    """
+    if reference_data is None or test_data is None:
+        if reference_data is None and test_data is None:
+            return None
+
+        return f'missing from {"reference" if reference_data is None else "test"} file'
+
+    reference_array = numpy.asarray(reference_data)
+    test_array = numpy.asarray(test_data)
+
+    if reference_array.shape != test_array.shape:
+        return f'shape {test_array.shape} != reference {reference_array.shape}'
+
+    if numpy.array_equal(reference_array, test_array):
+        return None
+
+    differing = numpy.count_nonzero(reference_array != test_array)
+    return f'{differing} of {reference_array.size} values differ'
+
+
+def _open_worker_sd_files(reference_file: str, test_file: str):
+    """Open the reference and test files once per worker process, and close
+    them when the worker exits. A `multiprocessing` finalizer is used because
+    `atexit` handlers are not run in forked worker processes.
+
+    """
+    for key, file in [('reference', reference_file), ('test', test_file)]:
+        file_sd = SD(file, SDC.READ)
+        _worker_sd_files[key] = (file_sd, set(file_sd.datasets()))
+
+    Finalize(None, _close_worker_sd_files, exitpriority=10)
+
+
+def _close_worker_sd_files():
+    """Close the files opened by `_open_worker_sd_files`."""
+    for file_sd, _ in _worker_sd_files.values():
+        file_sd.end()
+
+    _worker_sd_files.clear()
+
+
+def _compare_sds_in_worker(sds_name: str) -> tuple[str, str | None]:
+    """Compare one SDS using the files opened by `_open_worker_sd_files`."""
+    return sds_name, _compare_sds(
+        _worker_sd_files['reference'], _worker_sd_files['test'], sds_name
+    )
@@ -0,0 +1,213 @@
+"""Compare rasters to reference files one block at a time.
+
+Reading a whole raster with `dataset.read()` holds every band of both the
+test output and the reference file in memory at once. The functions in this
+module instead iterate over the native block windows of the reference raster,
+read the same window from each file and compare it within a tolerance,
+stopping at the first window that differs. Memory use is proportional to the
+block size, rather than the raster size. Because GDAL releases the GIL while
+reading, windows can also be compared across a pool of threads, each of which
+opens its own dataset handles.
+
+This module requires `rasterio` and `numpy`.
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Event, Lock, local
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from timing import timed
+
+# Rasters stored in strips (e.g., PNG or untiled GeoTIFF) have blocks one or a
+# few rows high, so consecutive strips are read together until each window
+# contains roughly this many pixels.
+MIN_WINDOW_PIXELS = 2**20
+
+
+def assert_rasters_equal(
+    test_file: str | Path,
+    reference_file: str | Path,
+    rtol: float = 1e-05,
+    atol: float = 1e-08,
+    max_workers: int | None = None,
+):
+    """Assert that every band of a raster matches a reference file within the
+    specified tolerance, as defined by `numpy.isclose`. NaN values are
+    considered equal. Metadata are not compared.
+
+    """
+    mismatch = find_raster_mismatch(
+        test_file, reference_file, rtol=rtol, atol=atol, max_workers=max_workers
+    )
+    assert mismatch is None, f'{Path(test_file).name}: {mismatch}'
+
+
+def find_raster_mismatch(
+    test_file: str | Path,
+    reference_file: str | Path,
+    rtol: float = 1e-05,
+    atol: float = 1e-08,
+    max_workers: int | None = None,
+) -> str | None:
+    """Compare all bands of a raster to a reference file, one window at a
+    time, and describe the first window found to differ beyond the specified
+    tolerance. None is returned if all values match.
+
+    If `max_workers` is greater than one, windows are compared across a pool
+    of threads. Once a mismatch is found, the remaining windows are skipped.
+
+    """
+    with timed('comparison', Path(test_file).name):
+        with rasterio.open(test_file) as test_dataset, rasterio.open(
+            reference_file
+        ) as reference_dataset:
+            shape_mismatch = _describe_shape_mismatch(test_dataset, reference_dataset)
+            if shape_mismatch is not None:
+                return shape_mismatch
+
+            windows = [
+                (band, window)
+                for band in reference_dataset.indexes
+                for window in get_comparison_windows(reference_dataset, band)
+            ]
+
+            if max_workers is None or max_workers <= 1:
+                for band, window in windows:
+                    mismatch = _compare_window(
+                        test_dataset, reference_dataset, band, window, rtol, atol
+                    )
+                    if mismatch is not None:
+                        return mismatch
+
+                return None
+
+        return _find_mismatch_in_threads(
+            test_file, reference_file, windows, rtol, atol, max_workers
+        )
+
+
+def get_comparison_windows(dataset, band: int) -> list[Window]:
+    """The native block windows of a band. Blocks that span the full width of
+    the raster are combined into windows of roughly `MIN_WINDOW_PIXELS`,
+    aligned to the block height, to limit the number of reads.
+
+    """
+    block_height, block_width = dataset.block_shapes[band - 1]
+
+    if block_width < dataset.width or block_height * block_width >= MIN_WINDOW_PIXELS:
+        return [window for _, window in dataset.block_windows(band)]
+
+    rows_per_window = block_height * max(
+        1, MIN_WINDOW_PIXELS // (block_height * block_width)
+    )
+
+    return [
+        Window(
+            0,
+            row_offset,
+            dataset.width,
+            min(rows_per_window, dataset.height - row_offset),
+        )
+        for row_offset in range(0, dataset.height, rows_per_window)
+    ]
+
+
+def _describe_shape_mismatch(test_dataset, reference_dataset) -> str | None:
+    """Check the band count and raster dimensions before reading data."""
+    test_shape = (test_dataset.count, test_dataset.height, test_dataset.width)
+    reference_shape = (
+        reference_dataset.count,
+        reference_dataset.height,
+        reference_dataset.width,
+    )
+
+    if test_shape != reference_shape:
+        return (
+            f'(bands, height, width) {test_shape} differs from reference '
+            f'{reference_shape}'
+        )
+
+    return None
+
+
+def _compare_window(
+    test_dataset,
+    reference_dataset,
+    band: int,
+    window: Window,
+    rtol: float,
+    atol: float,
+) -> str | None:
+    """Compare a single window of one band, and describe any differences."""
+    test_block = test_dataset.read(band, window=window)
+    reference_block = reference_dataset.read(band, window=window)
+
+    matches = np.isclose(
+        test_block, reference_block, rtol=rtol, atol=atol, equal_nan=True
+    )
+
+    if matches.all():
+        return None
+
+    differences = np.abs(
+        test_block.astype(np.float64) - reference_block.astype(np.float64)
+    )
+
+    return (
+        f'Band {band} differs from reference file more than allowed tolerance in '
+        f'rows {window.row_off}:{window.row_off + window.height}, columns '
+        f'{window.col_off}:{window.col_off + window.width}: '
+        f'{np.count_nonzero(~matches)} of {matches.size} values differ, maximum '
+        f'absolute difference {np.nanmax(differences[~matches])}'
+    )
+
+
+def _find_mismatch_in_threads(
+    test_file: str | Path,
+    reference_file: str | Path,
+    windows: list[tuple[int, Window]],
+    rtol: float,
+    atol: float,
+    max_workers: int,
+) -> str | None:
+    """Compare windows across a pool of threads. Dataset handles are not
+    thread-safe, so each thread opens the test and reference files once.
+
+    """
+    thread_datasets = local()
+    open_datasets = []
+    open_datasets_lock = Lock()
+    mismatch_found = Event()
+
+    def compare_in_thread(band_and_window: tuple[int, Window]) -> str | None:
+        if mismatch_found.is_set():
+            return None
+
+        if not hasattr(thread_datasets, 'pair'):
+            thread_datasets.pair = (
+                rasterio.open(test_file),
+                rasterio.open(reference_file),
+            )
+            with open_datasets_lock:
+                open_datasets.extend(thread_datasets.pair)
+
+        mismatch = _compare_window(*thread_datasets.pair, *band_and_window, rtol, atol)
+
+        if mismatch is not None:
+            mismatch_found.set()
+
+        return mismatch
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            mismatches = list(executor.map(compare_in_thread, windows))
+    finally:
+        for dataset in open_datasets:
+            dataset.close()
+
+    return next((mismatch for mismatch in mismatches if mismatch is not None), None)
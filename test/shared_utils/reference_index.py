@@ -0,0 +1,189 @@
+"""An in-memory index of `earthdata-hashdiff` reference files for a suite.
+
+Test notebooks typically call `nc4_matches_reference_hash_file` (or an
+equivalent) once per output, and each call opens and parses its own JSON
+reference file. The functions in this module instead load every reference
+file for a suite once, then verify many outputs in a single pass, with the
+hashes of each output computed in parallel across worker processes.
+
+This module requires `earthdata-hashdiff>=1.1.0`.
+
+"""
+
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+import json
+
+from earthdata_hashdiff import get_hash_from_geotiff_file, get_hashes_from_nc4_file
+
+from timing import record_timing
+from utilities import print_error
+
+GEOTIFF_EXTENSIONS = {'.tif', '.tiff'}
+
+
+def load_reference_index(
+    reference_dir: str | Path, pattern: str = '*_reference.json'
+) -> dict[str, dict[str, str]]:
+    """Parse every reference JSON file in a directory once, returning a
+    mapping from the reference file stem (e.g., `hoss_bounds_reference`) to
+    its mapping of group and variable paths to hash values.
+
+    """
+    reference_index = {}
+
+    for reference_file in sorted(Path(reference_dir).glob(pattern)):
+        with open(reference_file, encoding='utf-8') as file_handler:
+            reference_index[reference_file.stem] = json.load(file_handler)
+
+    return reference_index
+
+
+def default_reference_name(output_path: Path) -> str:
+    """Outputs are matched to a reference file named after the output stem,
+    e.g., `SPL2SMA_subset_bounding_box.tif` is verified against
+    `SPL2SMA_subset_bounding_box_reference.json`.
+
+    """
+    return f'{output_path.stem}_reference'
+
+
+def verify_outputs_against_index(
+    output_paths: list[str | Path],
+    reference_index: dict[str, dict[str, str]],
+    reference_name: Callable[[Path], str] = default_reference_name,
+    skipped_variables_or_groups: set[str] = set(),
+    skipped_metadata_attributes: set[str] = set(),
+    skipped_metadata_tags: set[str] = set(),
+    max_workers: int | None = None,
+) -> dict[str, list[str]]:
+    """Verify many outputs against a preloaded reference index in one pass.
+
+    Hashes for each output are generated in parallel by a pool of worker
+    processes, using the same `earthdata-hashdiff` functions as the
+    `*_matches_reference_hash_file` functions. GeoTIFF outputs are hashed as
+    a single raster, all other outputs are opened with `xarray`. Comparisons
+    against the index then happen in the calling process, so the index is
+    never copied to the workers.
+
+    Returns a report mapping each output path to the list of group or
+    variable paths that did not match, which is empty for a matching output.
+
+    """
+    output_paths = [Path(output_path) for output_path in output_paths]
+    report = {}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        output_hashes = executor.map(
+            _get_output_hashes,
+            output_paths,
+            [skipped_metadata_attributes] * len(output_paths),
+            [skipped_metadata_tags] * len(output_paths),
+        )
+
+        for output_path, (actual_hashes, hash_seconds) in zip(
+            output_paths, output_hashes
+        ):
+            reference_hashes = reference_index.get(reference_name(output_path))
+
+            if reference_hashes is None:
+                report[str(output_path)] = [
+                    f'No reference file: {reference_name(output_path)}.json'
+                ]
+            else:
+                report[str(output_path)] = get_mismatched_paths(
+                    actual_hashes, reference_hashes, skipped_variables_or_groups
+                )
+
+            record_timing(
+                'comparison',
+                output_path.name,
+                hash_seconds,
+                succeeded=len(report[str(output_path)]) == 0,
+            )
+
+    return report
+
+
+def verify_directory_against_index(
+    output_dir: str | Path,
+    reference_index: dict[str, dict[str, str]],
+    pattern: str = '*',
+    **kwargs,
+) -> dict[str, list[str]]:
+    """Verify every file in a directory matching `pattern` against a
+    preloaded reference index. See `verify_outputs_against_index` for the
+    supported keyword arguments and the format of the returned report.
+
+    """
+    output_paths = sorted(
+        output_path
+        for output_path in Path(output_dir).glob(pattern)
+        if output_path.is_file()
+    )
+    return verify_outputs_against_index(output_paths, reference_index, **kwargs)
+
+
+def get_mismatched_paths(
+    actual_hashes: dict[str, str],
+    reference_hashes: dict[str, str],
+    skipped_variables_or_groups: set[str] = set(),
+) -> list[str]:
+    """Return the group and variable paths whose hashes differ, or that are
+    only present in one of the two mappings. This applies the same rules as
+    `earthdata_hashdiff.nc4_matches_reference_hash_file`.
+
+    """
+    return sorted(
+        variable_or_group_name
+        for variable_or_group_name in actual_hashes.keys() | reference_hashes.keys()
+        if variable_or_group_name not in actual_hashes
+        or variable_or_group_name not in reference_hashes
+        or (
+            variable_or_group_name not in skipped_variables_or_groups
+            and actual_hashes[variable_or_group_name]
+            != reference_hashes[variable_or_group_name]
+        )
+    )
+
+
+def assert_outputs_match_index(report: dict[str, list[str]]):
+    """Print every mismatch from `verify_outputs_against_index`, then fail if
+    any output did not match its reference.
+
+    """
+    failed_outputs = {
+        output_path: mismatches
+        for output_path, mismatches in report.items()
+        if len(mismatches) > 0
+    }
+
+    for output_path, mismatches in failed_outputs.items():
+        print_error(f'{output_path}: {", ".join(mismatches)}')
+
+    assert not failed_outputs, f'{len(failed_outputs)} output(s) did not match'
+
+
+def _get_output_hashes(
+    output_path: Path,
+    skipped_metadata_attributes: set[str],
+    skipped_metadata_tags: set[str],
+) -> tuple[dict[str, str], float]:
+    """Generate hashes for a single output within a worker process, also
+    returning the time taken in seconds.
+
+    """
+    start_time = perf_counter()
+
+    if output_path.suffix.lower() in GEOTIFF_EXTENSIONS:
+        output_hashes = get_hash_from_geotiff_file(
+            str(output_path), skipped_metadata_tags
+        )
+    else:
+        output_hashes = get_hashes_from_nc4_file(
+            str(output_path), skipped_metadata_attributes=skipped_metadata_attributes
+        )
+
+    return output_hashes, perf_counter() - start_time
@@ -0,0 +1,274 @@
+"""Resumable downloads of Harmony results, with integrity checks.
+
+`harmony-py` download futures restart a file from the beginning after any
+interruption. The functions in this module instead write each file to a
+`.part` file alongside the target, and resume interrupted transfers with
+HTTP Range requests. A completed file is checked against the expected size
+and, where the server confirms that the `ETag` is the MD5 digest of the file,
+its MD5 checksum before being moved into place. S3 only guarantees this for
+single-part objects that are not encrypted, or are encrypted with SSE-S3;
+the `ETag` of an object encrypted with SSE-KMS or SSE-C is not its MD5 digest,
+so those downloads are only checked against their size.
+
+Downloads reuse the `requests` session of the `harmony-py` client, which
+holds Earthdata Login credentials and keeps a pool of connections per host.
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import md5
+from os import replace
+from pathlib import Path
+from time import sleep
+import re
+
+from harmony import Client
+from requests import Session
+from requests.exceptions import (
+    ChunkedEncodingError,
+    ConnectionError as RequestsConnectionError,
+    Timeout,
+)
+
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+MD5_ETAG_PATTERN = re.compile(r'^"?([0-9a-f]{32})"?$')
+
+# Server-side encryption for which S3 reports the MD5 digest of an object as
+# its ETag. No encryption header at all is equivalent.
+MD5_ETAG_ENCRYPTION = 'AES256'
+
+RETRYABLE_EXCEPTIONS = (ChunkedEncodingError, RequestsConnectionError, Timeout)
+
+
+class DownloadIntegrityError(Exception):
+    """Raised when a completed download does not match the size or ETag
+    reported by the server.
+
+    """
+
+
+def download_with_resume(
+    session: Session,
+    url: str,
+    target_path: str | Path,
+    max_attempts: int = 5,
+    timeout: float = 60,
+) -> Path:
+    """Download a URL to `target_path`, resuming from any partial download.
+
+    Data are written to `<target_path>.part`. If that file already exists,
+    for example following an interrupted transfer, only the remaining bytes
+    are requested. The `If-Range` header ensures the server sends the whole
+    file again if it has changed since the partial download started. After
+    a connection error the transfer is retried, with exponential backoff, up
+    to `max_attempts` times.
+
+    """
+    target_path = Path(target_path)
+    part_path = target_path.with_name(f'{target_path.name}.part')
+    etag_path = target_path.with_name(f'{target_path.name}.part.etag')
+
+    for attempt in range(max_attempts):
+        try:
+            expected_size, md5_digest = _download_remaining_bytes(
+                session, url, part_path, etag_path, timeout
+            )
+            break
+        except RETRYABLE_EXCEPTIONS as exception:
+            if attempt == max_attempts - 1:
+                raise
+
+            print(f'Download of {url} interrupted ({exception}), retrying.')
+            sleep(2**attempt)
+
+    _verify_download(part_path, etag_path, expected_size, md5_digest)
+    replace(part_path, target_path)
+    etag_path.unlink(missing_ok=True)
+    return target_path
+
+
+def download_job_results(
+    harmony_client: Client,
+    job_id: str,
+    directory: str | Path = '',
+    max_workers: int = 4,
+) -> list[str]:
+    """Wait for a Harmony job to finish, then download all of its results
+    with `download_with_resume`, using up to `max_workers` threads. Files
+    are named the same way as by `harmony_client.download_all`.
+
+    """
+    urls = list(harmony_client.result_urls(job_id))
+    session = _get_client_session(harmony_client)
+    target_paths = [
+        Path(directory) / harmony_client.get_download_filename_from_url(url)
+        for url in urls
+    ]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return [
+            str(target_path)
+            for target_path in executor.map(
+                lambda url_and_path: download_with_resume(session, *url_and_path),
+                zip(urls, target_paths),
+            )
+        ]
+
+
+def _get_client_session(harmony_client: Client) -> Session:
+    """Return the authenticated `requests` session of a `harmony-py` client.
+
+    `Client.session` is created by the first request the client makes, such
+    as `result_urls`. harmony-py has no public method to create it, so the
+    private `Client._session()` is only called, here, for a client that has
+    not yet made a request.
+
+    """
+    if harmony_client.session is not None:
+        return harmony_client.session
+
+    return harmony_client._session()
+
+
+def _download_remaining_bytes(
+    session: Session, url: str, part_path: Path, etag_path: Path, timeout: float
+) -> tuple[int | None, str | None]:
+    """Request any bytes not yet in the `.part` file and append them.
+
+    Returns the total expected size of the file, where the server provided
+    it, and its MD5 digest, where the server confirmed that its `ETag` is
+    one. The `ETag` and MD5 digest are saved alongside the `.part` file, so
+    a later attempt can resume the download and still verify it.
+
+    """
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    etag, md5_digest = _read_etag_file(etag_path)
+    headers = {'Accept-Encoding': 'identity'}
+
+    if offset > 0:
+        headers['Range'] = f'bytes={offset}-'
+        if etag is not None:
+            headers['If-Range'] = etag
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 416 and offset > 0:
+            expected_size = _get_content_range_total(response)
+        else:
+            return _append_response(response, part_path, etag_path, md5_digest)
+
+    if expected_size == offset:
+        # The partial file already holds every byte of the resource.
+        return expected_size, md5_digest
+
+    # The partial file does not match the size of the resource, so it is left
+    # over from a different object. Discard it and download the whole file.
+    part_path.unlink(missing_ok=True)
+    etag_path.unlink(missing_ok=True)
+    return _download_remaining_bytes(session, url, part_path, etag_path, timeout)
+
+
+def _append_response(
+    response, part_path: Path, etag_path: Path, md5_digest: str | None
+) -> tuple[int | None, str | None]:
+    """Write the body of a download response to the `.part` file, appending
+    to it for a partial (206) response. The `ETag` and MD5 digest of the
+    response, if any, are saved and replace `md5_digest`.
+
+    """
+    response.raise_for_status()
+
+    if response.status_code == 206:
+        mode = 'ab'
+        expected_size = _get_content_range_total(response)
+    else:
+        # The server ignored the Range request (or the resource changed), so
+        # the body is the whole file.
+        mode = 'wb'
+        content_length = response.headers.get('Content-Length')
+        expected_size = int(content_length) if content_length else None
+
+    if 'ETag' in response.headers:
+        md5_digest = _get_md5_etag(response)
+        etag_path.write_text(f'{response.headers["ETag"]}\n{md5_digest or ""}')
+
+    with open(part_path, mode) as file_handler:
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+            file_handler.write(chunk)
+
+    return expected_size, md5_digest
+
+
+def _read_etag_file(etag_path: Path) -> tuple[str | None, str | None]:
+    """Read the `ETag` and MD5 digest saved by a previous attempt."""
+    if not etag_path.exists():
+        return None, None
+
+    etag, _, md5_digest = etag_path.read_text().partition('\n')
+    return etag, md5_digest or None
+
+
+def _get_md5_etag(response) -> str | None:
+    """Return the MD5 digest in the `ETag` of a response, only if the server
+    confirms that the `ETag` is the MD5 digest of the whole object: it must
+    be 32 hexadecimal characters, and the object must not be encrypted with
+    SSE-KMS or SSE-C.
+
+    """
+    etag_match = MD5_ETAG_PATTERN.match(response.headers.get('ETag', ''))
+    encryption = response.headers.get(
+        'x-amz-server-side-encryption', MD5_ETAG_ENCRYPTION
+    )
+    customer_encryption = response.headers.get(
+        'x-amz-server-side-encryption-customer-algorithm'
+    )
+
+    if (
+        etag_match is None
+        or encryption != MD5_ETAG_ENCRYPTION
+        or customer_encryption is not None
+    ):
+        return None
+
+    return etag_match.group(1)
+
+
+def _get_content_range_total(response) -> int | None:
+    """Parse the total size from a `Content-Range: bytes 0-9/100` header."""
+    total = response.headers.get('Content-Range', '').rpartition('/')[2]
+    return int(total) if total.isdigit() else None
+
+
+def _verify_download(
+    part_path: Path,
+    etag_path: Path,
+    expected_size: int | None,
+    md5_digest: str | None,
+):
+    """Check a completed download against the size and, where the server
+    confirmed its `ETag` is one, the MD5 digest reported by the server. A
+    download that fails either check is deleted, with its saved `ETag`, so
+    that the next attempt starts again from the first byte.
+
+    """
+    actual_size = part_path.stat().st_size
+
+    if expected_size is not None and actual_size != expected_size:
+        part_path.unlink()
+        etag_path.unlink(missing_ok=True)
+        raise DownloadIntegrityError(
+            f'{part_path}: expected {expected_size} bytes, got {actual_size}'
+        )
+
+    if md5_digest is not None:
+        file_digest = md5()
+        with open(part_path, 'rb') as file_handler:
+            for chunk in iter(lambda: file_handler.read(DOWNLOAD_CHUNK_BYTES), b''):
+                file_digest.update(chunk)
+
+        if file_digest.hexdigest() != md5_digest:
+            part_path.unlink()
+            etag_path.unlink(missing_ok=True)
+            raise DownloadIntegrityError(
+                f'{part_path}: MD5 checksum does not match ETag {md5_digest}'
+            )
@@ -0,0 +1,88 @@
+"""Structured timing records for Harmony jobs and output comparisons.
+
+When the `REGRESSION_TIMINGS_FILE` environment variable is set, as it is by
+`notebook-entrypoint.sh` when running in a test suite container, each timing
+is appended to that file as a line of JSON. These records are summarised
+across suites by `test/notebook_timings.py`. Without the environment
+variable, recording a timing does nothing.
+
+Splitting the time a Harmony job spends processing from the time spent
+downloading its results needs extra requests for each job, so it is only
+done when the `REGRESSION_JOB_TIMINGS` environment variable is also set.
+Otherwise the `harmony_download` timing includes the time spent waiting for
+the job.
+
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from os import environ
+from threading import Lock
+from time import perf_counter
+import json
+
+TIMINGS_FILE_VARIABLE = 'REGRESSION_TIMINGS_FILE'
+JOB_TIMINGS_VARIABLE = 'REGRESSION_JOB_TIMINGS'
+
+_timings_file_lock = Lock()
+
+
+def timings_enabled() -> bool:
+    """Whether timing records will be written."""
+    return bool(environ.get(TIMINGS_FILE_VARIABLE))
+
+
+def job_timings_enabled() -> bool:
+    """Whether Harmony job processing times will be recorded separately from
+    download times.
+
+    """
+    return timings_enabled() and environ.get(JOB_TIMINGS_VARIABLE, '') not in (
+        '',
+        '0',
+        'false',
+    )
+
+
+def record_timing(category: str, name: str, seconds: float, **details):
+    """Append a timing record. The category is used to aggregate records,
+    for example `harmony_job`, `harmony_download` or `comparison`. The name
+    identifies the request or output being timed.
+
+    """
+    if not timings_enabled():
+        return
+
+    record = {
+        'category': category,
+        'name': str(name),
+        'seconds': round(seconds, 3),
+        'recorded_at': datetime.now(timezone.utc).isoformat(),
+        **details,
+    }
+
+    with _timings_file_lock:
+        with open(environ[TIMINGS_FILE_VARIABLE], 'a', encoding='utf-8') as file:
+            file.write(json.dumps(record, default=str) + '\n')
+
+
+@contextmanager
+def timed(category: str, name: str, **details):
+    """Record the duration of a block of code, whether or not it succeeds:
+
+    ```
+    with timed('comparison', output_file_name):
+        assert nc4_matches_reference_hash_file(output_file_name, reference_file)
+    ```
+
+    """
+    start_time = perf_counter()
+    succeeded = False
+
+    try:
+        yield
+        succeeded = True
+    finally:
+        record_timing(
+            category, name, perf_counter() - start_time, succeeded=succeeded, **details
+        )
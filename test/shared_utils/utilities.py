@@ -4,12 +4,19 @@ increase the readability of the regression test suite.
 
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from shutil import move
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
 
 from harmony import Client, Request
 from harmony.client import ProcessingFailedException
 
+from download_cache import add_to_cache, get_cached_output, request_fingerprint
+from resumable_download import download_job_results
+from timing import job_timings_enabled, record_timing, timed
+
 
 def print_error(error_string: str) -> str:
     """Print an error, with formatting for red text."""
@@ -22,49 +29,208 @@ def print_success(success_string: str) -> str:
 
 
 def submit_and_download(
-    harmony_client: Client, request: Request, output_file_name: str
+    harmony_client: Client,
+    request: Request,
+    output_file_name: str,
+    service_version: str | None = None,
+    resumable: bool = False,
 ):
     """Submit a Harmony request via a `harmony-py` client. Wait for the
     Harmony job to finish, then download the results to the specified file
     path.
 
+    If `service_version` is specified, the local download cache is checked
+    first, and the request is not submitted at all if an output for the same
+    request parameters, Harmony environment and service version was
+    previously downloaded. The deployed version of a service can be retrieved
+    with `download_cache.get_deployed_service_version`.
+
+    If `resumable` is set, results are downloaded with HTTP Range resume and
+    integrity checks (see `resumable_download.py`), instead of `harmony-py`
+    download futures.
+
     """
-    downloaded_filename = None
+    fingerprint = None
 
-    try:
-        job_id = harmony_client.submit(request)
+    if service_version is not None:
+        fingerprint = request_fingerprint(
+            request, service_version, harmony_client.config.root_url
+        )
+        if get_cached_output(fingerprint, output_file_name):
+            return
 
-        for filename in [
-            file_future.result()
-            for file_future in harmony_client.download_all(job_id, overwrite=True)
-        ]:
+    try:
+        with timed('harmony_submit', output_file_name):
+            job_id = harmony_client.submit(request)
 
-            print(f'Downloaded: {filename}')
-            downloaded_filename = filename
+        _download_job_output(
+            harmony_client, job_id, output_file_name, resumable=resumable
+        )
 
-        if downloaded_filename is not None:
-            move(downloaded_filename, output_file_name)
-            print(f'Saved output to: {output_file_name}')
+        if fingerprint is not None:
+            add_to_cache(fingerprint, output_file_name)
 
     except ProcessingFailedException as exception:
         print_error('Harmony request failed to complete successfully.')
         raise exception
 
 
+def submit_and_download_batch(
+    harmony_client: Client,
+    requests_and_outputs: list[tuple[Request, str]],
+    max_concurrent_jobs: int = 4,
+    service_version: str | None = None,
+    resumable: bool = False,
+) -> list[str]:
+    """Submit many independent Harmony requests via a `harmony-py` client
+    and download each result to its paired output file name.
+
+    Jobs are run concurrently, with at most `max_concurrent_jobs` Harmony
+    jobs in flight at any time. Each job is submitted, polled and downloaded
+    by its own worker, so outputs are saved as soon as the corresponding job
+    finishes, rather than in submission order. The suite wall-clock time is
+    therefore bounded by the slowest job, not the sum of all jobs.
+
+    All jobs are allowed to finish before any failure is raised, so that a
+    single failed request does not hide the results of the others. The
+    returned list contains the output file names that were saved.
+
+    The `harmony_client` only needs `submit` and `download_all` methods, so
+    a local fake client can be used in place of `harmony.Client`. If the
+    `REGRESSION_JOB_TIMINGS` environment variable is set, the client also
+    needs `wait_for_processing` and `status`, to time each job, and if
+    `service_version` is specified it needs a `config.root_url`.
+
+    As with `submit_and_download`, specifying `service_version` will reuse
+    cached outputs for requests that were previously downloaded, and setting
+    `resumable` will use the resumable downloader.
+
+    """
+    if max_concurrent_jobs < 1:
+        raise ValueError('max_concurrent_jobs must be at least 1.')
+
+    saved_outputs = []
+    failures = {}
+
+    with ThreadPoolExecutor(max_workers=max_concurrent_jobs) as executor:
+        future_to_output = {
+            executor.submit(
+                _submit_and_download_job,
+                harmony_client,
+                request,
+                output_file_name,
+                service_version,
+                resumable,
+            ): output_file_name
+            for request, output_file_name in requests_and_outputs
+        }
+
+        for future in as_completed(future_to_output):
+            output_file_name = future_to_output[future]
+            try:
+                future.result()
+                saved_outputs.append(output_file_name)
+            except Exception as exception:
+                print_error(
+                    f'Harmony request for {output_file_name} failed: {exception}'
+                )
+                failures[output_file_name] = exception
+
+    if failures:
+        print_error(
+            f'{len(failures)} of {len(future_to_output)} Harmony requests '
+            'failed to complete successfully.'
+        )
+        raise next(iter(failures.values()))
+
+    return saved_outputs
+
+
+def _submit_and_download_job(
+    harmony_client: Client,
+    request: Request,
+    output_file_name: str,
+    service_version: str | None,
+    resumable: bool,
+):
+    """Submit a single Harmony request and download its output. This is the
+    unit of work run by each worker in `submit_and_download_batch`.
+
+    Each job downloads into its own temporary directory, as concurrent jobs
+    for the same granule can produce results with identical file names.
+
+    """
+    fingerprint = None
+
+    if service_version is not None:
+        fingerprint = request_fingerprint(
+            request, service_version, harmony_client.config.root_url
+        )
+        if get_cached_output(fingerprint, output_file_name):
+            return
+
+    with timed('harmony_submit', output_file_name):
+        job_id = harmony_client.submit(request)
+
+    print(f'Submitted job {job_id} for: {output_file_name}')
+
+    with TemporaryDirectory() as job_directory:
+        _download_job_output(
+            harmony_client, job_id, output_file_name, job_directory, resumable
+        )
+
+    if fingerprint is not None:
+        add_to_cache(fingerprint, output_file_name)
+
+
+def _download_job_output(
+    harmony_client: Client,
+    job_id: str,
+    output_file_name: str,
+    working_dir: str | Path = '',
+    resumable: bool = False,
+):
+    """Wait for a Harmony job to finish, download all of its results, and
+    save the last downloaded file to the specified file path.
+
+    """
+    downloaded_filename = None
+
+    for filename in _download_job_results(
+        harmony_client, job_id, working_dir, resumable, output_file_name
+    ):
+        print(f'Downloaded: {filename}')
+        downloaded_filename = filename
+
+    if downloaded_filename is not None:
+        move(downloaded_filename, output_file_name)
+        print(f'Saved output to: {output_file_name}')
+
+
 def download_file_from_harmony(
     harmony_client: Client,
     job_id: str,
     target_filename: str | Path,
     working_dir: str | Path = "",
+    cache_key: str | None = None,
+    resumable: bool = False,
 ):
-    """Download a single file result from Harmony into the target_filename provided."""
+    """Download a single file result from Harmony into the target_filename provided.
 
-    files = [
-        file_future.result()
-        for file_future in harmony_client.download_all(
-            job_id, overwrite=True, directory=str(working_dir)
-        )
-    ]
+    If a `cache_key` is specified, for example from `request_fingerprint`, the
+    download is skipped when the local download cache already holds an output
+    for that key, and otherwise the downloaded file is added to the cache.
+
+    If `resumable` is set, the result is downloaded with HTTP Range resume and
+    integrity checks, instead of `harmony-py` download futures.
+
+    """
+    if cache_key is not None and get_cached_output(cache_key, target_filename):
+        return
+
+    files = _download_job_results(
+        harmony_client, job_id, working_dir, resumable, target_filename
+    )
 
     if len(files) > 1:
         print(
@@ -73,3 +239,77 @@ def download_file_from_harmony(
 
     Path(files[0]).replace(target_filename)
     print(f"Downloaded to: {target_filename}")
+
+    if cache_key is not None:
+        add_to_cache(cache_key, target_filename)
+
+
+def _download_job_results(
+    harmony_client: Client,
+    job_id: str,
+    working_dir: str | Path,
+    resumable: bool,
+    output_name: str | Path,
+) -> list[str]:
+    """Download all results of a Harmony job, either via `harmony-py`
+    download futures, or with the resumable downloader.
+
+    When job timings are enabled, the time spent waiting for the job is
+    recorded separately from the time spent downloading its results.
+    Otherwise, the download timing includes waiting for the job.
+
+    """
+    if job_timings_enabled():
+        _wait_for_job(harmony_client, job_id, output_name)
+
+    with timed('harmony_download', output_name, job_id=job_id):
+        if resumable:
+            return download_job_results(harmony_client, job_id, working_dir)
+
+        return [
+            file_future.result()
+            for file_future in harmony_client.download_all(
+                job_id, overwrite=True, directory=str(working_dir)
+            )
+        ]
+
+
+def _wait_for_job(harmony_client: Client, job_id: str, output_name: str | Path):
+    """Wait for a Harmony job with `harmony-py`, recording how long the client
+    waited. A single request for the final job status then adds the status and
+    the processing time reported by Harmony, from the creation of the job to
+    its last update. Job failures are left to be raised by the subsequent
+    download, and any error while timing the job is only printed, so that
+    timing can never fail a test suite.
+
+    """
+    start_time = perf_counter()
+
+    try:
+        harmony_client.wait_for_processing(job_id)
+    except ProcessingFailedException:
+        pass
+    except Exception as exception:
+        print(f'Unable to wait for Harmony job {job_id}: {exception}')
+        return
+
+    wait_seconds = perf_counter() - start_time
+
+    try:
+        job_status = harmony_client.status(job_id)
+        processing_seconds = round(
+            (job_status['updated_at'] - job_status['created_at']).total_seconds(), 3
+        )
+    except Exception as exception:
+        print(f'Unable to time Harmony job {job_id}: {exception}')
+        job_status = {}
+        processing_seconds = None
+
+    record_timing(
+        'harmony_job',
+        output_name,
+        wait_seconds,
+        job_id=job_id,
+        status=job_status.get('status'),
+        processing_seconds=processing_seconds,
+    )
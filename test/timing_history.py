@@ -0,0 +1,278 @@
+"""A local history of regression test durations, with slowdown detection.
+
+Each run of `run_notebooks.sh` writes `suite-runs.tsv` to the output
+directory, listing the image, service tag, duration and exit code of every
+suite. The `record` command appends these, along with the Harmony job and
+comparison timings in each suite's `timings.jsonl`, to an SQLite database.
+
+The `check` command compares the latest recorded run against a rolling
+baseline of previous runs of the same suite, in the same Harmony
+environment, with the same service tag. The service tag is the regression
+image tag computed by `script/compute-regression-image-tag.sh`, so that a
+baseline only contains runs against the same deployed service versions. A
+duration is flagged as a slowdown when it is more than `--threshold` robust
+standard deviations (scaled median absolute deviation) above the baseline
+median, and at least `--min-increase` slower in relative terms.
+
+This script only uses the Python standard library.
+
+Usage:
+
+    python timing_history.py record output --environment <url> [--db <path>]
+    python timing_history.py check --environment <url> [--db <path>]
+
+"""
+
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import median
+from uuid import uuid4
+import csv
+import sqlite3
+import sys
+
+from notebook_timings import read_timing_events
+
+# Scales the median absolute deviation to a standard deviation estimate for
+# normally distributed values.
+MAD_SCALE = 1.4826
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    recorded_at TEXT NOT NULL,
+    environment TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS suite_runs (
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    suite TEXT NOT NULL,
+    image TEXT,
+    service_tag TEXT,
+    duration_seconds REAL NOT NULL,
+    exit_code INTEGER
+);
+CREATE TABLE IF NOT EXISTS request_timings (
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    suite TEXT NOT NULL,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    processing_seconds REAL
+);
+CREATE INDEX IF NOT EXISTS suite_runs_suite ON suite_runs (suite, service_tag);
+CREATE INDEX IF NOT EXISTS request_timings_name
+    ON request_timings (suite, category, name);
+'''
+
+
+def connect(database_path: Path) -> sqlite3.Connection:
+    """Open the history database, creating the tables if needed."""
+    connection = sqlite3.connect(database_path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def record_run(connection: sqlite3.Connection, output_dir: Path, environment: str):
+    """Store the suite durations and request timings from one run."""
+    suite_runs_path = output_dir / 'suite-runs.tsv'
+
+    if not suite_runs_path.is_file():
+        print(f'No suite runs found at {suite_runs_path}')
+        return
+
+    run_id = str(uuid4())
+
+    with open(suite_runs_path, newline='', encoding='utf-8') as file_handler:
+        suite_runs = list(csv.DictReader(file_handler, delimiter='\t'))
+
+    with connection:
+        connection.execute(
+            'INSERT INTO runs VALUES (?, ?, ?)',
+            (run_id, datetime.now(timezone.utc).isoformat(), environment),
+        )
+        connection.executemany(
+            'INSERT INTO suite_runs VALUES (?, ?, ?, ?, ?, ?)',
+            [
+                (
+                    run_id,
+                    suite_run['suite'],
+                    suite_run['image'],
+                    suite_run['service_tag'] or suite_run['image'],
+                    float(suite_run['duration_seconds']),
+                    int(suite_run['exit_code']),
+                )
+                for suite_run in suite_runs
+            ],
+        )
+
+        for suite_run in suite_runs:
+            connection.executemany(
+                'INSERT INTO request_timings VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (
+                        run_id,
+                        suite_run['suite'],
+                        event['category'],
+                        event['name'],
+                        event['seconds'],
+                        event.get('processing_seconds'),
+                    )
+                    for event in read_timing_events(
+                        output_dir / suite_run['suite'] / 'timings.jsonl'
+                    )
+                ],
+            )
+
+    print(f'Recorded {len(suite_runs)} suite timings as run {run_id}')
+
+
+def is_slowdown(
+    latest: float,
+    baseline: list[float],
+    threshold: float,
+    min_increase: float,
+) -> bool:
+    """Whether the latest value is significantly slower than the baseline,
+    using a robust z-score based on the median absolute deviation.
+
+    """
+    baseline_median = median(baseline)
+    spread = MAD_SCALE * median(abs(value - baseline_median) for value in baseline)
+
+    if latest <= baseline_median * (1 + min_increase):
+        return False
+
+    if spread == 0:
+        return True
+
+    return (latest - baseline_median) / spread > threshold
+
+
+def find_slowdowns(
+    connection: sqlite3.Connection,
+    environment: str,
+    window: int,
+    threshold: float,
+    min_increase: float,
+    min_runs: int,
+) -> list[str]:
+    """Compare the latest run in an environment against the preceding runs
+    with the same suite and service tag, for suite durations and for the
+    durations of each named Harmony job, download and comparison.
+
+    """
+    latest_run = connection.execute(
+        'SELECT run_id FROM runs WHERE environment = ? '
+        'ORDER BY recorded_at DESC LIMIT 1',
+        (environment,),
+    ).fetchone()
+
+    if latest_run is None:
+        return []
+
+    slowdowns = []
+
+    for suite, service_tag, duration in connection.execute(
+        'SELECT suite, service_tag, duration_seconds FROM suite_runs '
+        'WHERE run_id = ? AND exit_code = 0',
+        latest_run,
+    ).fetchall():
+        baseline = [
+            row[0]
+            for row in connection.execute(
+                'SELECT suite_runs.duration_seconds FROM suite_runs '
+                'JOIN runs USING (run_id) '
+                'WHERE runs.environment = ? AND run_id != ? AND suite = ? '
+                'AND service_tag = ? AND exit_code = 0 '
+                'ORDER BY runs.recorded_at DESC LIMIT ?',
+                (environment, latest_run[0], suite, service_tag, window),
+            )
+        ]
+
+        if len(baseline) >= min_runs and is_slowdown(
+            duration, baseline, threshold, min_increase
+        ):
+            slowdowns.append(
+                f'{suite} ({service_tag}): {duration:.1f}s, '
+                f'baseline median {median(baseline):.1f}s over {len(baseline)} runs'
+            )
+
+        for category, name, seconds in connection.execute(
+            'SELECT category, name, seconds FROM request_timings '
+            'WHERE run_id = ? AND suite = ?',
+            (latest_run[0], suite),
+        ).fetchall():
+            request_baseline = [
+                row[0]
+                for row in connection.execute(
+                    'SELECT request_timings.seconds FROM request_timings '
+                    'JOIN runs USING (run_id) '
+                    'JOIN suite_runs USING (run_id, suite) '
+                    'WHERE runs.environment = ? AND run_id != ? AND suite = ? '
+                    'AND service_tag = ? AND category = ? AND name = ? '
+                    'AND suite_runs.exit_code = 0 '
+                    'ORDER BY runs.recorded_at DESC LIMIT ?',
+                    (
+                        environment,
+                        latest_run[0],
+                        suite,
+                        service_tag,
+                        category,
+                        name,
+                        window,
+                    ),
+                )
+            ]
+
+            if len(request_baseline) >= min_runs and is_slowdown(
+                seconds, request_baseline, threshold, min_increase
+            ):
+                slowdowns.append(
+                    f'{suite} {category} {name}: {seconds:.1f}s, baseline median '
+                    f'{median(request_baseline):.1f}s over '
+                    f'{len(request_baseline)} runs'
+                )
+
+    return slowdowns
+
+
+def main() -> int:
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('command', choices=['record', 'check'])
+    parser.add_argument('output_dir', nargs='?', default='output', type=Path)
+    parser.add_argument('--environment', required=True)
+    parser.add_argument('--db', type=Path, default=None)
+    parser.add_argument('--window', type=int, default=10)
+    parser.add_argument('--threshold', type=float, default=3.0)
+    parser.add_argument('--min-increase', type=float, default=0.2)
+    parser.add_argument('--min-runs', type=int, default=5)
+    arguments = parser.parse_args()
+
+    database_path = arguments.db or arguments.output_dir / 'timings.sqlite'
+    connection = connect(database_path)
+
+    if arguments.command == 'record':
+        record_run(connection, arguments.output_dir, arguments.environment)
+        return 0
+
+    slowdowns = find_slowdowns(
+        connection,
+        arguments.environment,
+        arguments.window,
+        arguments.threshold,
+        arguments.min_increase,
+        arguments.min_runs,
+    )
+
+    for slowdown in slowdowns:
+        print(f'Slowdown detected: {slowdown}')
+
+    if not slowdowns:
+        print('No slowdowns detected against the recorded baseline')
+
+    return 2 if slowdowns else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,8 +4,12 @@ increase the readability of the regression test suite.
 
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing.util import Finalize
 from os import listdir, remove, replace
-from typing import Union
+from posixpath import join as join_path
+from typing import Iterator, Union
 
 from harmony import Client, Request
 from harmony.client import ProcessingFailedException
@@ -14,6 +18,13 @@ import numpy as np
 
 GroupOrVariable = Union[Group, Variable]
 
+# Upper bound on the size of a block read from a contiguous (unchunked)
+# variable when comparing in streaming mode.
+CONTIGUOUS_BLOCK_BYTES = 16 * 1024 * 1024
+
+# File handles opened once by each worker process in a parallel comparison.
+_worker_datasets = {}
+
 
 def compare_attributes_to_reference(
     results_object: GroupOrVariable, ref_object: GroupOrVariable
@@ -35,16 +46,87 @@ def compare_attributes_to_reference(
                 assert results_object.getncattr(attribute_name) == ref_attribute_value
 
 
-def compare_variable_to_reference(results_variable: Variable, ref_variable: Variable):
+def compare_variable_to_reference(
+    results_variable: Variable, ref_variable: Variable, streaming: bool = False
+):
     """Compare two NetCDF-4 variables, ensuring they have the same data in
     their arrays and the same metadata attribute.
 
+    If `streaming` is set, the array values are compared block by block (see
+    `compare_variable_blocks_to_reference`), rather than reading both full
+    arrays into memory.
+
     """
-    np.testing.assert_array_equal(results_variable[:], ref_variable[:])
+    if streaming:
+        compare_variable_blocks_to_reference(results_variable, ref_variable)
+    else:
+        np.testing.assert_array_equal(results_variable[:], ref_variable[:])
+
     compare_attributes_to_reference(results_variable, ref_variable)
 
 
-def compare_group_to_reference(results_group: Group, ref_group: Group):
+def compare_variable_blocks_to_reference(
+    results_variable: Variable, ref_variable: Variable
+):
+    """Compare the array values of two NetCDF-4 variables one block at a
+    time, so that memory use is bounded by the size of a single block.
+
+    Blocks follow the on-disk chunk layout of the reference variable where
+    it is chunked. Contiguous variables are read in slabs along their first
+    dimension. The comparison stops at the first mismatching block, and the
+    raised `AssertionError` identifies the variable and the block indices.
+
+    """
+    assert results_variable.shape == ref_variable.shape, (
+        f'{ref_variable.name}: shape {results_variable.shape} does not match '
+        f'reference shape {ref_variable.shape}'
+    )
+
+    for block in get_variable_blocks(ref_variable):
+        np.testing.assert_array_equal(
+            results_variable[block],
+            ref_variable[block],
+            err_msg=f'{ref_variable.name}: mismatch in block {block}',
+        )
+
+
+def get_variable_blocks(variable: Variable) -> Iterator[tuple[slice, ...]]:
+    """Yield index tuples that together cover the whole array of a NetCDF-4
+    variable. Each block corresponds to one on-disk chunk for a chunked
+    variable, or a slab of rows, up to `CONTIGUOUS_BLOCK_BYTES` in size, for
+    a contiguous variable. Scalar variables are yielded as a single block.
+
+    """
+    shape = variable.shape
+
+    if len(shape) == 0:
+        yield ()
+        return
+
+    chunking = variable.chunking()
+
+    if chunking == 'contiguous':
+        row_bytes = np.dtype(variable.dtype).itemsize * int(np.prod(shape[1:]))
+        block_shape = [max(1, CONTIGUOUS_BLOCK_BYTES // max(1, row_bytes))]
+        block_shape.extend(shape[1:])
+    else:
+        block_shape = chunking
+
+    block_starts = [
+        range(0, dimension_size, block_size)
+        for dimension_size, block_size in zip(shape, block_shape)
+    ]
+
+    for starts in product(*block_starts):
+        yield tuple(
+            slice(start, min(start + block_size, dimension_size))
+            for start, block_size, dimension_size in zip(starts, block_shape, shape)
+        )
+
+
+def compare_group_to_reference(
+    results_group: Group, ref_group: Group, streaming: bool = False
+):
     """Compare two NetCDF-4 file groups, ensuring they have the same metadata
     attributes (excluding provenance), child variables and child groups.
     Child variables and groups are then compared recursively.
@@ -56,19 +138,163 @@ def compare_group_to_reference(results_group: Group, ref_group: Group):
     assert list(results_group.variables.keys()) == list(ref_group.variables.keys())
 
     for variable_name, ref_variable in ref_group.variables.items():
-        compare_variable_to_reference(results_group[variable_name], ref_variable)
+        compare_variable_to_reference(
+            results_group[variable_name], ref_variable, streaming
+        )
 
     for child_group_name, ref_child_group in ref_group.groups.items():
-        compare_group_to_reference(results_group[child_group_name], ref_child_group)
+        compare_group_to_reference(
+            results_group[child_group_name], ref_child_group, streaming
+        )
 
 
-def compare_results_to_reference_file(results_file: str, ref_file: str):
+def compare_results_to_reference_file(
+    results_file: str, ref_file: str, streaming: bool = False
+):
     """Compare two NetCDF-4 files recursively, checking that the both have the
     same group structure, variables and metadata attributes.
 
+    Set `streaming` to compare variable arrays chunk by chunk, which keeps
+    memory use bounded for large outputs.
+
+    """
+    with Dataset(results_file) as results_ds, Dataset(ref_file) as ref_ds:
+        compare_group_to_reference(results_ds, ref_ds, streaming)
+
+
+def compare_results_to_reference_file_parallel(
+    results_file: str,
+    ref_file: str,
+    max_workers: int | None = None,
+    streaming: bool = False,
+) -> dict[str, str]:
+    """Compare two NetCDF-4 files recursively, with the variable comparisons
+    spread across a pool of worker processes.
+
+    The group hierarchy, group attributes and child names are checked in the
+    calling process. Variable arrays and attributes are then compared in
+    parallel, with each worker opening its own handles to both files, as
+    the netCDF-C library is not thread-safe.
+
+    Unlike `compare_results_to_reference_file`, this does not stop at the
+    first failure. The returned report maps the path of every mismatching
+    group or variable to a description of the mismatch, and is empty when
+    the files match. Use `assert_comparison_report_empty` to fail a test.
+
     """
+    report = {}
+    variable_paths = []
+
     with Dataset(results_file) as results_ds, Dataset(ref_file) as ref_ds:
-        compare_group_to_reference(results_ds, ref_ds)
+        _collect_group_mismatches(results_ds, ref_ds, report, variable_paths)
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_open_worker_datasets,
+        initargs=(results_file, ref_file),
+    ) as executor:
+        for variable_path, mismatch in executor.map(
+            _compare_variable_in_worker,
+            variable_paths,
+            [streaming] * len(variable_paths),
+        ):
+            if mismatch is not None:
+                report[variable_path] = mismatch
+
+    return report
+
+
+def assert_comparison_report_empty(report: dict[str, str]):
+    """Print every mismatch in a report from
+    `compare_results_to_reference_file_parallel`, then fail if there were
+    any mismatches.
+
+    """
+    for object_path, mismatch in sorted(report.items()):
+        print_error(f'{object_path}: {mismatch}')
+
+    assert not report, f'{len(report)} group(s) or variable(s) did not match'
+
+
+def _collect_group_mismatches(
+    results_group: Group,
+    ref_group: Group,
+    report: dict[str, str],
+    variable_paths: list[str],
+):
+    """Recursively check group attributes and child names, recording any
+    mismatches in the report. The paths of variables present in both files
+    are gathered for comparison by the worker processes.
+
+    """
+    try:
+        compare_attributes_to_reference(results_group, ref_group)
+    except AssertionError as exception:
+        report[ref_group.path] = f'attributes differ {exception}'.strip()
+
+    if list(results_group.groups.keys()) != list(ref_group.groups.keys()):
+        report[f'{ref_group.path} (groups)'] = (
+            f'{list(results_group.groups.keys())} != {list(ref_group.groups.keys())}'
+        )
+
+    if list(results_group.variables.keys()) != list(ref_group.variables.keys()):
+        report[f'{ref_group.path} (variables)'] = (
+            f'{list(results_group.variables.keys())} != '
+            f'{list(ref_group.variables.keys())}'
+        )
+
+    for variable_name in ref_group.variables:
+        if variable_name in results_group.variables:
+            variable_paths.append(join_path(ref_group.path, variable_name))
+
+    for child_group_name, ref_child_group in ref_group.groups.items():
+        if child_group_name in results_group.groups:
+            _collect_group_mismatches(
+                results_group[child_group_name],
+                ref_child_group,
+                report,
+                variable_paths,
+            )
+
+
+def _open_worker_datasets(results_file: str, ref_file: str):
+    """Open the results and reference files once per worker process, and
+    close them when the worker exits. A `multiprocessing` finalizer is used
+    because `atexit` handlers are not run in forked worker processes.
+
+    """
+    _worker_datasets['results'] = Dataset(results_file)
+    _worker_datasets['reference'] = Dataset(ref_file)
+    Finalize(None, _close_worker_datasets, exitpriority=10)
+
+
+def _close_worker_datasets():
+    """Close the files opened by `_open_worker_datasets`."""
+    for dataset in _worker_datasets.values():
+        dataset.close()
+
+    _worker_datasets.clear()
+
+
+def _compare_variable_in_worker(
+    variable_path: str, streaming: bool
+) -> tuple[str, str | None]:
+    """Compare a single variable using the worker process file handles,
+    returning the variable path and a description of any mismatch.
+
+    """
+    try:
+        compare_variable_to_reference(
+            _worker_datasets['results'][variable_path],
+            _worker_datasets['reference'][variable_path],
+            streaming,
+        )
+    except AssertionError as exception:
+        return variable_path, str(exception).strip() or 'values differ'
+    except Exception as exception:
+        return variable_path, f'{type(exception).__name__}: {exception}'
+
+    return variable_path, None
 
 
 def submit_and_download(